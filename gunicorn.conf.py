@@ -0,0 +1,30 @@
+# Production server for the dashboard/API:
+#   gunicorn -c gunicorn.conf.py
+import gc
+import os
+
+wsgi_app = "serving.api:app"
+pythonpath = "src"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4")) # Threads share the forecast micro-batcher
+timeout = 120
+
+# Import the app (and the pickled models) once in the master;
+# forked workers share that memory copy-on-write.
+preload_app = True
+
+def when_ready(server):
+    from serving.api import models
+    models.preload() # Scaler + Random Forest; the LSTM (TensorFlow) loads per worker
+    # Keep the preloaded objects out of the GC's reach so collections
+    # in the workers do not write to (and un-share) their pages
+    gc.freeze()
+
+def post_worker_init(worker):
+    from serving import api
+    # Optional: pay the TensorFlow import/LSTM load before serving traffic
+    if os.environ.get("GUNICORN_WARM_UP") == "1":
+        api.models.warm_up()
+    # Threads do not survive fork: each worker polls the model registry itself
+    api.start_model_watcher()
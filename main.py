@@ -8,24 +8,26 @@ import os
 from src.config import Config
 from src.ingestion.run_etl import run_etl
 from src.processing.pipeline import DatePipeline
+from src.processing.warehouse import Warehouse
 from src.modeling.lstm import LstmModel
 from src.modeling.classifier import AirQualityClassifier
+from src.modeling.registry import ModelRegistry
 from src.evaluation.metrics import ModelEvaluator
 
-def run_enterprise_pipeline():
+def run_enterprise_pipeline(incremental=False):
     print("========================================")
     print("   AIR QUALITY ENTERPRISE SYSTEM        ")
     print("========================================")
 
     # 1. Run ETL (Data Lake -> Warehouse)
     print("\n[Step 1] Running Enterprise ETL...")
-    run_etl()
+    run_etl(incremental=incremental)
 
     # 2. Load Processed Data (Parquet)
     print("\n[Step 2] Loading Data from Warehouse...")
-    processed_path = os.path.join(Config.DATA_WAREHOUSE_DIR, f"{Config.COLLECTION_PROCESSED}.parquet")
-    df = pd.read_parquet(processed_path)
-    print(f"Loaded {len(df)} records from {processed_path}")
+    warehouse = Warehouse()
+    df = warehouse.read()
+    print(f"Loaded {len(df)} records from {warehouse.path}")
 
     # 3. Model Training
     print("\n[Step 3] Training Advanced Models...")
@@ -38,14 +40,13 @@ def run_enterprise_pipeline():
     # LSTM Training
     print("--- Training LSTM ---")
     df_scaled = pipeline.scale_data(df_features, fit=True)
-    X, y = pipeline.create_sequences(df_scaled[['pm25', 'pm10', 'no2', 'o3', 'pm25_roll_mean_24h']], Config.LSTM_SEQ_LEN)
+    # Windows are streamed from the scaled frame instead of materialized up front,
+    # never across two sensors, and each sensor is split by time
+    train_ds, val_ds = LstmModel.make_datasets(df_scaled[Config.LSTM_FEATURES], Config.LSTM_SEQ_LEN,
+                                               sensors=df_features['sensor_id'].to_numpy())
     
-    split_idx = int(len(X) * 0.9) # 90/10 split for final prod
-    X_train, X_test = X[:split_idx], X[split_idx:]
-    y_train, y_test = y[:split_idx], y[split_idx:]
-    
-    lstm = LstmModel(input_shape=(X_train.shape[1], X_train.shape[2]))
-    lstm.train(X_train, y_train, validation_data=(X_test, y_test))
+    lstm = LstmModel(input_shape=(Config.LSTM_SEQ_LEN, len(Config.LSTM_FEATURES)))
+    lstm.train(train_ds, validation_data=val_ds)
     
     # RF Classification Training
     print("--- Training Risk Classifier (RF + SHAP) ---")
@@ -55,9 +56,26 @@ def run_enterprise_pipeline():
     X_cls = X_cls.select_dtypes(include=[np.number])
     
     classifier.train(X_cls, df_cls['risk_label'])
+
+    # 4. Publish the scaler/LSTM/RF trained in this run as one bundle
+    print("\n[Step 4] Publishing Model Bundle...")
+    lstm_file = "lstm_best.keras" if os.path.exists(os.path.join(Config.MODEL_DIR, "lstm_best.keras")) else "lstm_model.keras"
+    # Weights of the same checkpoint for the TensorFlow-free serving backend
+    LstmModel.export_numpy(os.path.join(Config.MODEL_DIR, lstm_file), os.path.join(Config.MODEL_DIR, "lstm_weights.npz"))
+    registry = ModelRegistry()
+    version = registry.publish(
+        {name: os.path.join(Config.MODEL_DIR, name) for name in ["scaler.pkl", lstm_file, "lstm_weights.npz", "rf_classifier.pkl"]},
+        metadata={"records": len(df), "warehouse_version": warehouse.version(), "lstm_features": Config.LSTM_FEATURES}
+    )
+    registry.promote(version) # Running APIs hot-swap to it on their next poll
     
     print("\n>>> Enterprise Pipeline Complete.")
     print("    Start the Dashboard with: python src/serving/api.py")
 
 if __name__ == "__main__":
-    run_enterprise_pipeline()
+    import argparse
+    parser = argparse.ArgumentParser(description="ETL, training and model publishing")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Append only new raw readings to the Warehouse instead of regenerating it")
+    args = parser.parse_args()
+    run_enterprise_pipeline(incremental=args.incremental)
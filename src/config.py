@@ -6,17 +6,48 @@ class Config:
     DB_NAME = "air_quality_db"
     COLLECTION_RAW = "raw_readings"
     COLLECTION_PROCESSED = "processed_features"
+    MONGO_BATCH_SIZE = 5000  # Records per insert_many call
+    MONGO_WRITE_WORKERS = 1  # Parallel writer threads
+    ETL_BATCH_SIZE = 50000  # Rows per chunk when streaming raw readings
+    ETL_LOOKBACK_HOURS = 24  # Context re-read by incremental ETL runs
+
+    # Sensors
+    POLLUTANTS = ['pm25', 'pm10', 'no2', 'o3']
 
     # Data Gen
     N_SAMPLES = 5000
     START_DATE = "2023-01-01"
     FREQ = "h" # Hourly
+    RANDOM_SEED = 42
+
+    # Cleaning
+    IMPUTATION_STRATEGY = "interpolate"  # 'interpolate', 'seasonal', 'knn' or 'knn_full' (legacy)
+    IMPUTATION_N_JOBS = -1  # Parallel sensors (-1: all cores)
+    IMPUTATION_WINDOW = 1000  # Rows per local KNN neighbourhood
+    IMPUTATION_SEASON = "24h"  # Look-back used by the seasonal strategy
+
+    # Feature Engineering
+    FEATURE_LAGS = [1, 24]  # Hours, applied to every pollutant
+    ROLLING_WINDOWS = [24]  # Hours
+    ROLLING_COLUMNS = ['pm25']
+    FEATURE_N_JOBS = -1  # Parallel sensors (-1: all cores)
+
+    # Risk Scoring API
+    RISK_BATCH_CHUNK = 2048  # Readings scored per model call
+    RISK_STREAM_MIN_ROWS = 1000  # Larger batches get an NDJSON streamed response
 
     # Paths
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     DATA_LAKE_DIR = os.path.join(BASE_DIR, "data", "raw")
     DATA_WAREHOUSE_DIR = os.path.join(BASE_DIR, "data", "processed")
+    WAREHOUSE_PARTITION = "month"  # sensor_id/date partition granularity: "month" or "day"
+    WAREHOUSE_COMPACT_MIN_FILES = 8  # Parts per partition before compaction
+    ROLLUP_DIR = os.path.join(DATA_WAREHOUSE_DIR, "rollups")  # Pre-aggregated min/max/sum/count per sensor
+    ROLLUP_MAX_BUCKETS = 1000  # Range queries use the finest grain (hour/day/week) within this many buckets
     MODEL_DIR = os.path.join(BASE_DIR, "models")
+    MODEL_REGISTRY_DIR = os.path.join(MODEL_DIR, "registry")
+    MODEL_REGISTRY_KEEP = 5  # Old versions kept besides the current one
+    MODEL_RELOAD_INTERVAL = 10  # Seconds between API checks for a newly promoted bundle
     LOG_DIR = os.path.join(BASE_DIR, "logs")
     STATIC_DIR = os.path.join(BASE_DIR, "static")
     PLOT_DIR = os.path.join(STATIC_DIR, "plots")
@@ -25,6 +56,54 @@ class Config:
     LSTM_SEQ_LEN = 24  # Use past 24 hours to predict next
     LSTM_EPOCHS = 10
     LSTM_BATCH_SIZE = 32
+    LSTM_VAL_SPLIT = 0.1  # Last 10% of windows (by time) for validation
+    LSTM_FEATURES = ['pm25', 'pm10', 'no2', 'o3', 'pm25_roll_mean_24h']
+
+    # ARIMA (per-sensor batch training)
+    ARIMA_ORDERS = [(5, 1, 0), (2, 1, 2), (1, 1, 1), (2, 1, 0), (0, 1, 1)]  # First is the default order
+    ARIMA_N_JOBS = -1
+    ARIMA_MAX_OBS = 24 * 90  # Fit on the last 90 days per sensor
+    ARIMA_PRUNE_ITER = 10  # Order search: short fit (optimizer iterations) for every candidate...
+    ARIMA_PRUNE_KEEP = 3  # ...then fit only the best ones to convergence
+    ARIMA_PREDICT_CONTEXT = 24 * 14  # Recent hours filtered before forecasting
+
+    # Backtesting (rolling-origin, per sensor)
+    BACKTEST_MODE = "expanding"  # "expanding": all history before each fold; "sliding": last BACKTEST_WINDOW rows
+    BACKTEST_FOLDS = 5
+    BACKTEST_TEST_SIZE = 24 * 7  # Hours per test fold (one-step-ahead forecasts)
+    BACKTEST_MIN_TRAIN = 24 * 30  # Folds with less training history are skipped
+    BACKTEST_WINDOW = 24 * 90  # Training rows per fold in sliding mode
+    BACKTEST_MODELS = ["naive", "arima", "lstm"]  # "naive": persistence baseline (pm25 of the previous hour)
+    BACKTEST_LSTM_EPOCHS = 3
+    BACKTEST_N_JOBS = -1
+    BACKTEST_CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "backtest")  # Engineered features per sensor
+
+    # Forecast Serving
+    LSTM_BACKEND = "numpy"  # "numpy": exported weights, no TensorFlow in the API; "keras": full model
+    FORECAST_HORIZON = 24  # Hours ahead (recursive)
+    FORECAST_MAX_BATCH = 64  # Max requests coalesced into one model call
+    FORECAST_MAX_WAIT_MS = 5  # How long the batcher waits for more requests
+    FORECAST_TIMEOUT = 30  # Seconds a request waits for its batched forecast
+
+    # History Charts
+    DOWNSAMPLE_METHOD = "minmax"  # /api/history?max_points=: "minmax" (keeps peaks) or "lttb"
+    DOWNSAMPLE_MIN_POINTS = 20  # Smallest max_points accepted (a few points per series)
+    RESPONSE_COMPRESS_MIN_BYTES = 1024  # Smaller API responses are not compressed
+    RESPONSE_GZIP_LEVEL = 5
+    RESPONSE_BROTLI_QUALITY = 5  # Used when the optional brotli package is installed
+
+    # Async Serving (ASGI mode: uvicorn serving.asgi:app)
+    ASGI_WORKERS = 2  # uvicorn processes (CPU-bound inference scales with processes)
+    ASGI_THREADS = 8  # Requests running at once per process (Parquet reads, model calls)
+    ASGI_MAX_QUEUE = 64  # Requests allowed to wait for a thread; beyond that -> 503
+    ASGI_QUEUE_TIMEOUT = 5  # Seconds a queued request waits before 503
+
+    # Live Stream (SSE /api/stream)
+    LIVE_POLL_INTERVAL = 5  # Seconds between checks for newly loaded warehouse data
+    LIVE_HEARTBEAT = 15  # Seconds between keep-alive comments on idle streams
+    LIVE_CLIENT_BUFFER = 256  # Events queued per client; slower clients are disconnected (they resume)
+    LIVE_REPLAY = 1024  # Recent events kept for Last-Event-ID resumption
+    LIVE_RETRY_MS = 3000  # Browser reconnect delay
     
     # Risk Levels
     RISK_THRESHOLDS = {
@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+from itertools import combinations
+from joblib import Memory, Parallel, delayed
+import warnings
+import time
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from evaluation.metrics import ModelEvaluator
+from processing.pipeline import DatePipeline
+from processing.warehouse import Warehouse
+
+def _sensor_features(path, version, sensor_id, lags, windows):
+    """
+    Engineered features of one sensor, in time order.
+    `version` (the warehouse version) is only part of the cache key.
+    """
+    df = Warehouse(path).read(sensors=[sensor_id])
+    return DatePipeline().engineer_features(df, lags, windows, n_jobs=1)
+
+def _naive_forecast(train, test, target):
+    # Persistence: the previous hour's reading
+    lag_col = f'{target}_lag1'
+    if lag_col in test.columns:
+        return test[lag_col].to_numpy(dtype=float)
+    return pd.concat([train[target].iloc[-1:], test[target]]).to_numpy(dtype=float)[:-1]
+
+def _arima_forecast(train, test, target):
+    from statsmodels.tsa.arima.model import ARIMA
+    from modeling.arima import ArimaModel, _hourly_series
+
+    train = train.iloc[-Config.ARIMA_MAX_OBS:]
+    arima = ArimaModel(order=Config.ARIMA_ORDERS[0])
+    arima.train(_hourly_series(train, target), save=False)
+    # Same parameters over train + test: one-step-ahead predictions from the Kalman filter
+    series = _hourly_series(pd.concat([train, test]), target)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        result = ARIMA(series, order=arima.order).filter(arima.fit_model.params.to_numpy())
+    timestamps = pd.DatetimeIndex(pd.to_datetime(test['timestamp']))
+    return result.predict(start=timestamps[0], end=timestamps[-1]).reindex(timestamps).to_numpy()
+
+def _lstm_forecast(train, test, target):
+    from sklearn.preprocessing import MinMaxScaler
+    import tensorflow as tf # Deferred: only the LSTM folds pay for TensorFlow
+    from modeling.lstm import LstmModel
+
+    tf.keras.utils.set_random_seed(Config.RANDOM_SEED)
+    features, seq_len = Config.LSTM_FEATURES, Config.LSTM_SEQ_LEN
+    target_idx = features.index(target)
+    # Scaler fitted on the fold's training rows only (no look-ahead)
+    scaler = MinMaxScaler(feature_range=(0, 1)).fit(train[features])
+    train_scaled = pd.DataFrame(scaler.transform(train[features]), columns=features)
+    train_ds, val_ds = LstmModel.make_datasets(train_scaled, seq_len, target)
+    lstm = LstmModel(input_shape=(seq_len, len(features)))
+    lstm.train(train_ds, validation_data=val_ds, epochs=Config.BACKTEST_LSTM_EPOCHS, save=False, verbose=0)
+
+    # Window ending right before each test row
+    context = pd.concat([train.iloc[-seq_len:], test])
+    X, _ = DatePipeline().create_sequences(scaler.transform(context[features]), seq_len, target=target_idx, copy=True)
+    y_scaled = lstm.model.predict(X, verbose=0)[:, 0]
+    return y_scaled * scaler.data_range_[target_idx] + scaler.data_min_[target_idx]
+
+FORECASTERS = {
+    "naive": _naive_forecast,
+    "arima": _arima_forecast,
+    "lstm": _lstm_forecast,
+}
+
+def _feature_rows(features, source):
+    # Builds (or hits) the cache entry; only the row count travels back
+    return len(features(*source))
+
+def _run_fold(features, source, fold, models, target):
+    """
+    Trains every model on one fold and forecasts its test block.
+    Runs in a worker process: the sensor's features come from the on-disk cache.
+    """
+    frame = features(*source)
+    train = frame.iloc[fold['train_start']:fold['train_end']]
+    test = frame.iloc[fold['train_end']:fold['test_end']]
+    predictions, seconds = {}, {}
+    for model in models:
+        start = time.perf_counter()
+        try:
+            predictions[model] = np.asarray(FORECASTERS[model](train, test, target), dtype=float)
+        except Exception as e:
+            print(f"Warning: {model} failed on {source[2]} fold {fold['fold']}: {e}")
+            predictions[model] = None
+        seconds[model] = time.perf_counter() - start
+    return {
+        "y_true": test[target].to_numpy(dtype=float),
+        "test_start": str(test['timestamp'].iloc[0]),
+        "test_end": str(test['timestamp'].iloc[-1]),
+        "predictions": predictions,
+        "seconds": seconds,
+    }
+
+class Backtester:
+    """
+    Rolling-origin evaluation of the forecast models on warehouse data.
+    Per sensor, the last n_folds blocks of test_size hours are forecast one
+    step ahead, each by models trained only on the rows before the block:
+        expanding: all earlier rows; sliding: the last `window` rows.
+    Folds run in a process pool; each sensor's engineered features are
+    computed once per warehouse version and cached on disk, so workers (and
+    the next nightly run) load them instead of re-running the pipeline.
+    """
+    def __init__(self, mode=None, n_folds=None, test_size=None, min_train=None, window=None,
+                 n_jobs=None, cache_dir=None, warehouse=None, target='pm25'):
+        self.mode = mode or Config.BACKTEST_MODE
+        if self.mode not in ("expanding", "sliding"):
+            raise ValueError(f"Unknown backtest mode '{self.mode}' (expected 'expanding' or 'sliding')")
+        self.n_folds = n_folds or Config.BACKTEST_FOLDS
+        self.test_size = test_size or Config.BACKTEST_TEST_SIZE
+        self.min_train = min_train or Config.BACKTEST_MIN_TRAIN
+        self.window = window or Config.BACKTEST_WINDOW
+        self.n_jobs = Config.BACKTEST_N_JOBS if n_jobs is None else n_jobs
+        self.warehouse = warehouse or Warehouse()
+        self.target = target
+        self.memory = Memory(cache_dir or Config.BACKTEST_CACHE_DIR, verbose=0)
+        self.features = self.memory.cache(_sensor_features)
+
+    def folds(self, n_rows):
+        """
+        Row ranges of the folds for a sensor with n_rows feature rows, oldest first.
+        """
+        folds = []
+        for k in range(self.n_folds, 0, -1):
+            train_end = n_rows - k * self.test_size
+            train_start = max(train_end - self.window, 0) if self.mode == "sliding" else 0
+            if train_end - train_start < self.min_train:
+                continue
+            folds.append({"fold": self.n_folds - k, "train_start": train_start,
+                          "train_end": train_end, "test_end": train_end + self.test_size})
+        return folds
+
+    def _sources(self, sensors):
+        version = self.warehouse.version()
+        return {sensor_id: (self.warehouse.path, version, sensor_id, tuple(Config.FEATURE_LAGS), tuple(Config.ROLLING_WINDOWS))
+                for sensor_id in sensors}
+
+    def run(self, sensors=None, models=None):
+        """
+        Returns {"folds": metrics per sensor/fold/model, "summary": mean/std per model,
+                 "dm": Diebold-Mariano tests per fold and pooled, for every model pair}.
+        """
+        models = list(models or Config.BACKTEST_MODELS)
+        unknown = [m for m in models if m not in FORECASTERS]
+        if unknown:
+            raise ValueError(f"Unknown models: {unknown} (available: {list(FORECASTERS)})")
+        if not self.warehouse.exists():
+            raise FileNotFoundError(f"Data Warehouse not found: {self.warehouse.path} (run the ETL first)")
+        if sensors is None:
+            sensors = sorted(self.warehouse.read(columns=['sensor_id'])['sensor_id'].astype(str).unique())
+        sources = self._sources(sensors)
+
+        start = time.perf_counter()
+        n_rows = Parallel(n_jobs=self.n_jobs)(delayed(_feature_rows)(self.features, sources[s]) for s in sensors)
+        tasks = [(sensor_id, fold) for sensor_id, rows in zip(sensors, n_rows) for fold in self.folds(rows)]
+        print(f"Backtesting {models} on {len(sensors)} sensors, {len(tasks)} folds ({self.mode}), "
+              f"features ready in {time.perf_counter() - start:.1f}s")
+
+        results = Parallel(n_jobs=self.n_jobs)(
+            delayed(_run_fold)(self.features, sources[sensor_id], fold, models, self.target) for sensor_id, fold in tasks
+        )
+        report = self._report(tasks, results, models)
+        print(f"Backtest finished in {time.perf_counter() - start:.1f}s")
+        return report
+
+    def _report(self, tasks, results, models):
+        rows, dm_rows = [], []
+        pooled = {pair: ([], [], []) for pair in combinations(models, 2)}
+        for (sensor_id, fold), result in zip(tasks, results):
+            y_true, predictions = result['y_true'], result['predictions']
+            info = {"sensor_id": sensor_id, "fold": fold['fold'], "train_rows": fold['train_end'] - fold['train_start'],
+                    "test_start": result['test_start'], "test_end": result['test_end']}
+            for model in models:
+                if predictions[model] is None:
+                    continue
+                metrics = ModelEvaluator.calculate_metrics(y_true, predictions[model], model, verbose=False)
+                rows.append({**info, "model": model, **metrics, "seconds": result['seconds'][model]})
+            for (m1, m2), (y, p1, p2) in pooled.items():
+                if predictions[m1] is None or predictions[m2] is None:
+                    continue
+                dm_stat, p_value = ModelEvaluator.diebold_mariano_test(y_true, predictions[m1], predictions[m2], verbose=False)
+                dm_rows.append({"sensor_id": sensor_id, "fold": fold['fold'], "model_1": m1, "model_2": m2,
+                                "dm_stat": dm_stat, "p_value": p_value, "n": len(y_true)})
+                y.append(y_true), p1.append(predictions[m1]), p2.append(predictions[m2])
+
+        # Pooled over every sensor and fold
+        for (m1, m2), (y, p1, p2) in pooled.items():
+            if not y:
+                continue
+            print(f"\n{m1} vs {m2} (all folds):")
+            dm_stat, p_value = ModelEvaluator.diebold_mariano_test(np.concatenate(y), np.concatenate(p1), np.concatenate(p2))
+            dm_rows.append({"sensor_id": "all", "fold": "all", "model_1": m1, "model_2": m2,
+                            "dm_stat": dm_stat, "p_value": p_value, "n": sum(len(v) for v in y)})
+
+        folds = pd.DataFrame(rows)
+        summary = folds.groupby('model')[['RMSE', 'MAE', 'MAPE', 'seconds']].agg(['mean', 'std']) if rows else pd.DataFrame()
+        if rows:
+            print("\n--- Backtest Summary (mean/std across folds) ---")
+            print(summary.round(4).to_string())
+        return {"folds": folds, "summary": summary, "dm": pd.DataFrame(dm_rows)}
+
+    def save(self, report, directory=None):
+        """
+        Writes the report tables as backtest_<table>.csv.
+        """
+        directory = directory or Config.LOG_DIR
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, table in report.items():
+            path = os.path.join(directory, f"backtest_{name}.csv")
+            table.to_csv(path, index=(name == "summary"))
+            paths.append(path)
+        print(f"Backtest report saved to {directory}")
+        return paths
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the forecast models")
+    parser.add_argument("--mode", choices=["expanding", "sliding"], default=None)
+    parser.add_argument("--folds", type=int, default=None, help="Test folds per sensor")
+    parser.add_argument("--test-size", type=int, default=None, help="Hours per test fold")
+    parser.add_argument("--models", nargs="+", default=None, choices=list(FORECASTERS))
+    parser.add_argument("--sensors", nargs="+", default=None, help="Sensor ids (default: all)")
+    parser.add_argument("--n-jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    backtester = Backtester(mode=args.mode, n_folds=args.folds, test_size=args.test_size, n_jobs=args.n_jobs)
+    backtester.save(backtester.run(sensors=args.sensors, models=args.models))
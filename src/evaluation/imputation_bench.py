@@ -0,0 +1,92 @@
+import argparse
+import time
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ingestion.generator import FleetGenerator
+from processing.cleaner import DataCleaner
+
+# Fleet sizes as (sensors, hourly steps per sensor): 20k, 100k, 438k and 1.75M rows
+DEFAULT_SIZES = ["1x20000", "20x5000", "50x8760", "200x8760"]
+STRATEGIES = ["knn_full", "interpolate", "seasonal", "knn"]
+FLEET_SEED, MASK_SEED = 3, 0 # Seeds of the published benchmark
+
+def make_fleet(n_sensors, n_steps, seed=FLEET_SEED):
+    """
+    Complete synthetic readings (no gaps, no spikes), so every masked value
+    has a ground truth the strategies can be expected to recover.
+    """
+    gen = FleetGenerator(n_sensors=n_sensors, n_steps=n_steps, seed=seed, missing_rate=0, spike_rate=0)
+    return pd.concat(gen.iter_chunks(chunk_steps=24 * 30), ignore_index=True)
+
+def mask_values(df, column='pm25', rate=0.05, seed=MASK_SEED):
+    """
+    Copy of df with `rate` of `column` set to NaN, and the masked positions.
+    """
+    rng = np.random.default_rng(seed)
+    masked = rng.random(len(df)) < rate
+    df_masked = df.copy()
+    df_masked.loc[masked, column] = np.nan
+    return df_masked, masked
+
+def benchmark(df, strategies=None, column='pm25', rate=0.05, knn_full_max_rows=None):
+    """
+    Wall time and RMSE on the masked values per strategy,
+    through DataCleaner.handle_missing_values (the ETL's path).
+    knn_full is skipped (None) above knn_full_max_rows: it is quadratic in rows.
+    """
+    df_masked, masked = mask_values(df, column, rate)
+    truth = df[column].to_numpy()[masked]
+    cleaner = DataCleaner()
+    results = {}
+    for strategy in strategies or STRATEGIES:
+        if strategy == 'knn_full' and knn_full_max_rows is not None and len(df) > knn_full_max_rows:
+            results[strategy] = None
+            continue
+        start = time.perf_counter()
+        filled = cleaner.handle_missing_values(df_masked, strategy=strategy)
+        seconds = time.perf_counter() - start
+        if filled[column].isna().any():
+            raise AssertionError(f"{strategy} left missing values in {column}")
+        rmse = float(np.sqrt(np.mean((filled[column].to_numpy()[masked] - truth) ** 2)))
+        results[strategy] = {"seconds": round(seconds, 2), "rmse": round(rmse, 1)}
+    return results
+
+def _print_report(report, strategies):
+    print(f"\n  {'rows (sensors)':<18}" + "".join(f"{s:>18}" for s in strategies))
+    for row in report:
+        label = f"{row['rows'] / 1000:.0f}k ({row['sensors']})" if row['rows'] < 1e6 else f"{row['rows'] / 1e6:.2f}M ({row['sensors']})"
+        cells = []
+        for s in strategies:
+            r = row['results'].get(s)
+            cells.append(f"{r['seconds']:>9} s {r['rmse']:>5}" if r else f"{'-':>18}")
+        print(f"  {label:<18}" + "".join(f"{c:>18}" for c in cells))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Imputation strategies vs the full-matrix KNN: accuracy and wall time")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="Fleets as SENSORSxSTEPS")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument("--mask-rate", type=float, default=0.05, help="Share of PM2.5 values hidden and re-imputed")
+    parser.add_argument("--knn-full-max-rows", type=int, default=500000,
+                        help="Skip knn_full on larger fleets (438k rows take about 10 minutes)")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = []
+    for size in args.sizes:
+        n_sensors, n_steps = (int(v) for v in size.lower().split('x'))
+        df = make_fleet(n_sensors, n_steps)
+        print(f"\n{len(df)} rows ({n_sensors} sensors x {n_steps} steps)")
+        results = benchmark(df, args.strategies, rate=args.mask_rate, knn_full_max_rows=args.knn_full_max_rows)
+        report.append({"sensors": n_sensors, "steps": n_steps, "rows": len(df), "results": results})
+
+    _print_report(report, args.strategies)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
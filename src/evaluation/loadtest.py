@@ -0,0 +1,192 @@
+import argparse
+import http.client
+import subprocess
+import threading
+import socket
+import time
+import json
+import os
+import sys
+from urllib.parse import urlsplit
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+# Dashboard traffic: the overview refresh, charts and the load balancer probe
+DEFAULT_PATHS = ["/api/stats", "/api/history?period=24h", "/api/history?period=30d", "/health"]
+
+# How each server mode is started (run from the repository root)
+SERVERS = {
+    "flask": [sys.executable, "src/serving/api.py"],
+    "asgi": [sys.executable, "-m", "uvicorn", "serving.asgi:app", "--app-dir", "src", "--log-level", "warning"],
+    "gunicorn": ["gunicorn", "-c", "gunicorn.conf.py"],
+}
+
+class LoadTester:
+    """
+    Closed-loop HTTP load generator (stdlib only): `concurrency` keep-alive
+    clients each send the next request as soon as the previous one returns,
+    cycling through `paths`. Reports throughput and latency percentiles,
+    overall and per path, so server modes can be compared on the same mix.
+    """
+    def __init__(self, base_url, paths=None, concurrency=32, duration=20, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.paths = paths or DEFAULT_PATHS
+        self.concurrency = concurrency
+        self.duration = duration
+        self.timeout = timeout
+
+    def _client(self, offset, deadline, results):
+        conn = None
+        i = offset
+        while time.perf_counter() < deadline:
+            path = self.paths[i % len(self.paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+                if response.getheader("Connection", "").lower() == "close":
+                    conn.close()
+                    conn = None
+            except (OSError, http.client.HTTPException):
+                status = 0 # Connection error/timeout
+                if conn is not None:
+                    conn.close()
+                conn = None
+            results.append((path, status, time.perf_counter() - start))
+        if conn is not None:
+            conn.close()
+
+    def run(self):
+        results = []
+        deadline = time.perf_counter() + self.duration
+        clients = [threading.Thread(target=self._client, args=(c, deadline, results), daemon=True)
+                   for c in range(self.concurrency)]
+        started = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        return self._report(results, time.perf_counter() - started)
+
+    @staticmethod
+    def _summary(rows, elapsed):
+        latencies = np.array([latency for _, _, latency in rows]) * 1000
+        statuses = [status for _, status, _ in rows]
+        return {
+            "requests": len(rows),
+            "rps": round(len(rows) / elapsed, 1),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 1),
+            "max_ms": round(float(latencies.max()), 1),
+            "rejected_503": statuses.count(503),
+            "errors": sum(1 for s in statuses if s == 0 or (s >= 400 and s != 503)),
+        }
+
+    def _report(self, results, elapsed):
+        if not results:
+            return {"total": None, "paths": {}}
+        return {
+            "concurrency": self.concurrency,
+            "seconds": round(elapsed, 1),
+            "total": self._summary(results, elapsed),
+            "paths": {path: self._summary([r for r in results if r[0] == path], elapsed)
+                      for path in self.paths if any(r[0] == path for r in results)},
+        }
+
+def wait_until_ready(port, timeout=120):
+    """
+    Polls /health until the server answers (model loading can take a while).
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return True
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.5)
+    return False
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(mode, port, workers=1):
+    """
+    Starts one server mode on `port` and waits for it. The Flask dev server
+    always binds port 5000.
+    """
+    command = list(SERVERS[mode])
+    env = dict(os.environ)
+    if mode == "asgi":
+        command += ["--port", str(port), "--workers", str(workers)]
+    elif mode == "gunicorn":
+        env["GUNICORN_BIND"] = f"127.0.0.1:{port}"
+        env["GUNICORN_WORKERS"] = str(workers)
+    else:
+        port = 5000
+    process = subprocess.Popen(command, cwd=Config.BASE_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_until_ready(port):
+        process.terminate()
+        raise RuntimeError(f"{mode} server did not become ready on port {port}")
+    return process, port
+
+def _print_report(name, report):
+    total = report["total"]
+    if total is None:
+        print(f"{name}: no requests completed")
+        return
+    print(f"\n{name}: {total['requests']} requests in {report['seconds']}s, {report['concurrency']} clients")
+    print(f"  {'path':<32} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'503':>6} {'err':>6}")
+    for path, s in list(report["paths"].items()) + [("TOTAL", total)]:
+        print(f"  {path:<32} {s['rps']:>8} {s['p50_ms']:>8} {s['p95_ms']:>8} {s['p99_ms']:>8} "
+              f"{s['max_ms']:>8} {s['rejected_503']:>6} {s['errors']:>6}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the prediction API (throughput, p99 latency)")
+    parser.add_argument("--url", help="Test an already running server (e.g. http://localhost:5000)")
+    parser.add_argument("--servers", nargs="+", choices=list(SERVERS), default=["flask", "asgi"],
+                        help="Server modes to start and compare one after another (ignored with --url)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for the asgi/gunicorn modes")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per server")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--output", help="Write the reports to this JSON file")
+    args = parser.parse_args()
+
+    reports = {}
+    if args.url:
+        reports[args.url] = LoadTester(args.url, args.paths, args.concurrency, args.duration).run()
+    else:
+        for mode in args.servers:
+            print(f"Starting {mode} server...")
+            process, port = start_server(mode, _free_port(), args.workers)
+            try:
+                url = f"http://127.0.0.1:{port}"
+                LoadTester(url, args.paths, args.concurrency, duration=2).run() # Warm-up (caches, lazy model loads)
+                reports[mode] = LoadTester(url, args.paths, args.concurrency, args.duration).run()
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+    for name, report in reports.items():
+        _print_report(name, report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\nReports saved to {args.output}")
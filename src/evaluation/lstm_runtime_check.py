@@ -0,0 +1,118 @@
+import argparse
+import subprocess
+import tempfile
+import time
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+PARITY_TOLERANCE = 1e-5 # Max abs difference allowed between the backends (float32)
+BATCH_SIZES = [1, 32, 256]
+
+# Loads one backend and scores a batch in a fresh process, then reports its peak RSS
+_MEMORY_PROBE = """
+import resource, sys, numpy as np
+sys.path.insert(0, {src!r})
+backend, path = sys.argv[1], sys.argv[2]
+if backend == 'keras':
+    import tensorflow as tf
+    model = tf.keras.models.load_model(path)
+else:
+    from serving.lstm_runtime import NumpyLstm
+    model = NumpyLstm(path)
+shape = (256,) + tuple(model.input_shape[-2:])
+model.predict_on_batch(np.random.default_rng(0).random(shape, dtype=np.float32))
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+def check_parity(keras_model, numpy_model, n_windows=512, seed=None):
+    """
+    Max abs difference between the Keras and NumPy forecasts on random
+    scaled windows; raises AssertionError above PARITY_TOLERANCE.
+    """
+    rng = np.random.default_rng(Config.RANDOM_SEED if seed is None else seed)
+    X = rng.random((n_windows,) + numpy_model.input_shape[-2:], dtype=np.float32)
+    expected = keras_model.predict(X, verbose=0)
+    actual = numpy_model.predict(X)
+    assert actual.shape == expected.shape, f"Output shape {actual.shape} != Keras {expected.shape}"
+    diff = float(np.abs(actual - expected).max())
+    assert diff <= PARITY_TOLERANCE, f"NumPy runtime differs from Keras by {diff:.2e} (> {PARITY_TOLERANCE:.0e})"
+    empty = numpy_model.predict(X[:0])
+    assert empty.shape == (0, expected.shape[1]), f"Empty batch gave shape {empty.shape}"
+    return diff
+
+def benchmark_latency(model, input_shape, batch_sizes=None, repeats=50):
+    """
+    Median/p95 milliseconds of one predict_on_batch call per batch size
+    (the call LstmForecaster makes).
+    """
+    rng = np.random.default_rng(Config.RANDOM_SEED)
+    results = {}
+    for batch_size in batch_sizes or BATCH_SIZES:
+        X = rng.random((batch_size,) + tuple(input_shape[-2:]), dtype=np.float32)
+        model.predict_on_batch(X) # Warm-up (graph tracing for Keras)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict_on_batch(X)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[batch_size] = {"p50_ms": round(float(np.percentile(timings, 50)), 3),
+                               "p95_ms": round(float(np.percentile(timings, 95)), 3)}
+    return results
+
+def peak_memory_mb(backend, path):
+    """
+    Peak RSS (MB) of a process that loads the backend and scores 256 windows.
+    Call it before importing TensorFlow: Linux children inherit the parent's peak.
+    """
+    probe = _MEMORY_PROBE.format(src=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    output = subprocess.run([sys.executable, "-c", probe, backend, path], capture_output=True, text=True, check=True)
+    return round(int(output.stdout.split()[-1]) / 1024, 1) # ru_maxrss is in KB on Linux
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NumPy LSTM runtime vs Keras: parity, latency and memory")
+    parser.add_argument("--model", default=os.path.join(Config.MODEL_DIR, "lstm_best.keras"), help="Trained Keras model")
+    parser.add_argument("--weights", default=os.path.join(Config.MODEL_DIR, "lstm_weights.npz"),
+                        help="Its NumPy export, for the memory probe")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--skip-memory", action="store_true", help="Do not start the memory probe processes")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = {"peak_rss_mb": {}}
+    if not args.skip_memory:
+        report["peak_rss_mb"] = {"keras": peak_memory_mb("keras", args.model), "numpy": peak_memory_mb("numpy", args.weights)}
+
+    import tensorflow as tf
+    from modeling.lstm import LstmModel
+    from serving.lstm_runtime import NumpyLstm
+
+    keras_model = tf.keras.models.load_model(args.model)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Export the same checkpoint, so both backends hold identical weights
+        weights = os.path.join(tmp, "lstm_weights.npz")
+        LstmModel.export_numpy(keras_model, weights)
+        numpy_model = NumpyLstm(weights)
+
+        diff = check_parity(keras_model, numpy_model)
+        print(f"Parity: max abs difference {diff:.2e} (tolerance {PARITY_TOLERANCE:.0e})")
+
+        report.update(max_abs_diff=diff, latency={})
+        for name, model in (("keras", keras_model), ("numpy", numpy_model)):
+            report["latency"][name] = benchmark_latency(model, numpy_model.input_shape, repeats=args.repeats)
+
+    print(f"\n  {'batch':>6} {'keras p50':>10} {'numpy p50':>10} {'keras p95':>10} {'numpy p95':>10}")
+    for batch_size in BATCH_SIZES:
+        k, n = report["latency"]["keras"][batch_size], report["latency"]["numpy"][batch_size]
+        print(f"  {batch_size:>6} {k['p50_ms']:>10} {n['p50_ms']:>10} {k['p95_ms']:>10} {n['p95_ms']:>10}")
+    for name, mb in report["peak_rss_mb"].items():
+        print(f"  peak RSS {name}: {mb} MB")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
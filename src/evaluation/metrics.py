@@ -5,20 +5,21 @@ from scipy import stats
 
 class ModelEvaluator:
     @staticmethod
-    def calculate_metrics(y_true, y_pred, model_name="Model"):
+    def calculate_metrics(y_true, y_pred, model_name="Model", verbose=True):
         rmse = np.sqrt(mean_squared_error(y_true, y_pred))
         mae = mean_absolute_error(y_true, y_pred)
         mape = np.mean(np.abs((y_true - y_pred) / y_true)) * 100
         
-        print(f"--- {model_name} Performance ---")
-        print(f"RMSE: {rmse:.4f}")
-        print(f"MAE:  {mae:.4f}")
-        print(f"MAPE: {mape:.2f}%")
+        if verbose:
+            print(f"--- {model_name} Performance ---")
+            print(f"RMSE: {rmse:.4f}")
+            print(f"MAE:  {mae:.4f}")
+            print(f"MAPE: {mape:.2f}%")
         
         return {"RMSE": rmse, "MAE": mae, "MAPE": mape}
 
     @staticmethod
-    def diebold_mariano_test(y_true, y_pred_1, y_pred_2, h=1):
+    def diebold_mariano_test(y_true, y_pred_1, y_pred_2, h=1, verbose=True):
         """
         Diebold-Mariano Test for comparison of predictive accuracy.
         H0: Both models have same accuracy.
@@ -38,17 +39,18 @@ class ModelEvaluator:
         # p-value (two-tailed)
         p_value = 2 * (1 - stats.norm.cdf(np.abs(dm_stat)))
         
-        print(f"\n--- Diebold-Mariano Test ---")
-        print(f"DM Statistic: {dm_stat:.4f}")
-        print(f"p-value: {p_value:.6f}")
-        
-        if p_value < 0.05:
-            print("=> Reject H0: Significant difference between models.")
-            if dm_stat < 0:
-                print("=> Model 1 has lower errors (Better).")
+        if verbose:
+            print(f"\n--- Diebold-Mariano Test ---")
+            print(f"DM Statistic: {dm_stat:.4f}")
+            print(f"p-value: {p_value:.6f}")
+        
+            if p_value < 0.05:
+                print("=> Reject H0: Significant difference between models.")
+                if dm_stat < 0:
+                    print("=> Model 1 has lower errors (Better).")
+                else:
+                    print("=> Model 2 has lower errors (Better).")
             else:
-                print("=> Model 2 has lower errors (Better).")
-        else:
-            print("=> Fail to Reject H0: No significant difference.")
+                print("=> Fail to Reject H0: No significant difference.")
             
         return dm_stat, p_value
@@ -1,5 +1,8 @@
 import pymongo
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, BulkWriteError
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import time
 import sys
 import os
 import json
@@ -22,20 +25,96 @@ class MongoDBClient:
             self.use_fallback = True
             os.makedirs(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data"), exist_ok=True)
 
-    def insert_many(self, collection_name, data):
+    def _lake_path(self, collection_name, ext="jsonl"):
+        return os.path.join(Config.DATA_LAKE_DIR, f"{collection_name}.{ext}")
+
+    @staticmethod
+    def _iter_batches(data, batch_size):
+        """
+        Yields lists of at most batch_size records from a list of dicts or a DataFrame.
+        DataFrames are converted one batch at a time (NaN -> None).
+        """
+        for start in range(0, len(data), batch_size):
+            if isinstance(data, pd.DataFrame):
+                chunk = data.iloc[start:start + batch_size].astype(object)
+                yield chunk.where(chunk.notna(), None).to_dict('records')
+            else:
+                yield data[start:start + batch_size]
+
+    def _write_batch(self, collection, batch):
+        """
+        Unordered insert: one bad document does not stop the rest of the batch.
+        Returns (inserted, errors).
+        """
+        try:
+            result = collection.insert_many(batch, ordered=False)
+            return len(result.inserted_ids), 0
+        except BulkWriteError as e:
+            return e.details.get('nInserted', 0), len(e.details.get('writeErrors', []))
+
+    def insert_many(self, collection_name, data, batch_size=None, workers=None):
+        """
+        Bulk-inserts records (list of dicts or DataFrame) in batches.
+        MongoDB: unordered insert_many per batch, optionally on parallel writer threads.
+        Fallback: appends JSON Lines to the Data Lake instead of rewriting it.
+        Returns throughput statistics.
+        """
+        batch_size = batch_size or Config.MONGO_BATCH_SIZE
+        workers = workers or Config.MONGO_WRITE_WORKERS
+        start = time.perf_counter()
+        inserted, errors, n_batches = 0, 0, 0
+
         if not self.use_fallback:
             collection = self.db[collection_name]
-            if data:
-                result = collection.insert_many(data)
-                print(f"Inserted {len(result.inserted_ids)} records into {collection_name}")
-                return result
+            if workers > 1:
+                # Keep at most 2 batches per writer in flight to bound memory
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    in_flight = deque()
+                    for batch in self._iter_batches(data, batch_size):
+                        if len(in_flight) >= 2 * workers:
+                            ok, err = in_flight.popleft().result()
+                            inserted, errors = inserted + ok, errors + err
+                        in_flight.append(pool.submit(self._write_batch, collection, batch))
+                        n_batches += 1
+                    for future in in_flight:
+                        ok, err = future.result()
+                        inserted, errors = inserted + ok, errors + err
+            else:
+                for batch in self._iter_batches(data, batch_size):
+                    ok, err = self._write_batch(collection, batch)
+                    inserted, errors, n_batches = inserted + ok, errors + err, n_batches + 1
+            target = collection_name
         else:
-            # Fallback: Write to Data Lake
+            # Fallback: Append to Data Lake (JSON Lines)
             os.makedirs(Config.DATA_LAKE_DIR, exist_ok=True)
-            file_path = os.path.join(Config.DATA_LAKE_DIR, f"{collection_name}.json")
-            with open(file_path, 'w') as f:
-                json.dump(data, f)
-            print(f"Fallback: Saved {len(data)} records to Data Lake: {file_path}")
+            target = self._lake_path(collection_name)
+            latest = {} # sensor_id -> latest timestamp written by this call
+            with open(target, 'ab') as f:
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                for batch in self._iter_batches(data, batch_size):
+                    f.write(''.join(json.dumps(record, default=str) + '\n' for record in batch).encode())
+                    for record in batch:
+                        if record.get('timestamp') is not None and not pd.isna(record['timestamp']):
+                            sensor_id, ts = str(record.get('sensor_id')), self._ts(record['timestamp'])
+                            if ts > latest.get(sensor_id, ''):
+                                latest[sensor_id] = ts
+                    inserted, n_batches = inserted + len(batch), n_batches + 1
+                end = f.tell()
+            if end > offset:
+                self._append_segment(collection_name, offset, end, latest)
+
+        seconds = time.perf_counter() - start
+        stats = {
+            "inserted": inserted,
+            "errors": errors,
+            "batches": n_batches,
+            "seconds": round(seconds, 3),
+            "records_per_sec": round(inserted / seconds, 1) if seconds > 0 else None
+        }
+        print(f"Inserted {inserted} records into {target} "
+              f"({n_batches} batches, {stats['records_per_sec']} rec/s, {errors} errors)")
+        return stats
 
     def fetch_all(self, collection_name):
         if not self.use_fallback:
@@ -43,21 +122,160 @@ class MongoDBClient:
             data = list(collection.find({}, {'_id': 0}))
             return data
         else:
-            # Fallback
-            file_path = os.path.join(Config.DATA_LAKE_DIR, f"{collection_name}.json")
-            if os.path.exists(file_path):
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                print(f"Fallback: Loaded {len(data)} records from Data Lake: {file_path}")
-                return data
-            else:
-                return []
+            # Fallback (JSON Lines, plus legacy single JSON file if present)
+            data = list(self._iter_lake(collection_name))
+            if data:
+                print(f"Fallback: Loaded {len(data)} records from Data Lake: {Config.DATA_LAKE_DIR}")
+            return data
+
+    @staticmethod
+    def _ts(value):
+        # Raw timestamps are stored as ISO-8601 strings, which sort chronologically
+        return value if isinstance(value, str) else pd.Timestamp(value).isoformat()
+
+    @staticmethod
+    def _to_frame(batch, projection):
+        df = pd.DataFrame.from_records(batch, columns=projection)
+        # A chunk where a sensor was down for every reading would otherwise be object dtype
+        for col in Config.POLLUTANTS:
+            if col in df.columns:
+                df[col] = df[col].astype(float)
+        return df
+
+    def _append_segment(self, collection_name, start, end, latest):
+        """
+        Records which bytes of the JSON Lines file one insert_many call wrote and
+        the latest timestamp per sensor in them, so reads with `since` can skip it.
+        """
+        with open(self._lake_path(collection_name, ext="jsonl.idx"), 'a') as f:
+            f.write(json.dumps({"start": start, "end": end, "latest": latest}) + '\n')
+
+    def _load_segments(self, collection_name):
+        path = self._lake_path(collection_name, ext="jsonl.idx")
+        segments = []
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        segments.append(json.loads(line))
+                    except ValueError:
+                        break # Torn last line: the segment is read instead of skipped
+        return segments
+
+    @staticmethod
+    def _read_lines(f, end=None):
+        while end is None or f.tell() < end:
+            line = f.readline()
+            if not line:
+                return
+            if line.strip():
+                yield json.loads(line)
+
+    def _iter_lake(self, collection_name, skip=None):
+        """
+        Yields the Data Lake records in insertion order. skip(latest) may
+        drop whole indexed segments by their latest timestamp per sensor;
+        lines written before the index existed are always read.
+        """
+        legacy_path = self._lake_path(collection_name, ext="json")
+        if os.path.exists(legacy_path):
+            with open(legacy_path, 'r') as f:
+                yield from json.load(f)
+        file_path = self._lake_path(collection_name)
+        if os.path.exists(file_path):
+            size = os.path.getsize(file_path)
+            skipped = []
+            if skip is not None:
+                skipped = [(s["start"], s["end"]) for s in self._load_segments(collection_name)
+                           if s["end"] <= size and skip(s["latest"])]
+            with open(file_path, 'rb') as f:
+                for start, end in skipped:
+                    yield from self._read_lines(f, end=start)
+                    f.seek(end)
+                yield from self._read_lines(f)
+
+    def fetch_iter(self, collection_name, batch_size=None, since=None, until=None, projection=None):
+        """
+        Streams a collection as DataFrame chunks of at most batch_size rows.
+        since/until filter on timestamp (since < timestamp <= until) and
+        projection limits the fields read; both run server-side on MongoDB.
+        since may also be a {sensor_id: timestamp} mapping: sensors missing
+        from it are read from the beginning.
+        On the Data Lake, segments with nothing newer than since are skipped
+        without being parsed.
+        """
+        batch_size = batch_size or Config.ETL_BATCH_SIZE
+        by_sensor = None
+        if isinstance(since, dict):
+            by_sensor = {str(sensor_id): self._ts(ts) for sensor_id, ts in since.items()}
+            since = None
+        since = self._ts(since) if since is not None else None
+        until = self._ts(until) if until is not None else None
+
+        def lower_bound(sensor_id):
+            return by_sensor.get(str(sensor_id)) if by_sensor is not None else since
+
+        if not self.use_fallback:
+            collection = self.db[collection_name]
+            query = {}
+            if since is not None or until is not None:
+                collection.create_index('timestamp')
+                query['timestamp'] = {}
+                if since is not None:
+                    query['timestamp']['$gt'] = since
+                if until is not None:
+                    query['timestamp']['$lte'] = until
+            if by_sensor is not None:
+                collection.create_index([('sensor_id', 1), ('timestamp', 1)])
+                query['$or'] = [{'sensor_id': sensor_id, 'timestamp': {'$gt': ts}} for sensor_id, ts in by_sensor.items()]
+                query['$or'].append({'sensor_id': {'$nin': list(by_sensor)}})
+            fields = {'_id': 0}
+            if projection:
+                fields.update({col: 1 for col in projection})
+            records = collection.find(query, fields, batch_size=batch_size)
+        else:
+            # Same semantics over the Data Lake, one line at a time
+            def covered(latest):
+                # Every sensor of the segment already read up to its bound
+                for sensor_id, ts in latest.items():
+                    bound = lower_bound(sensor_id)
+                    if bound is None or ts > bound:
+                        return False
+                return True
+
+            def lake_records():
+                skip = covered if since is not None or by_sensor is not None else None
+                for record in self._iter_lake(collection_name, skip):
+                    ts = record.get('timestamp')
+                    bound = lower_bound(record.get('sensor_id'))
+                    if bound is not None or until is not None:
+                        if ts is None or pd.isna(ts):
+                            continue # No timestamp: outside any range, as on MongoDB
+                        ts = self._ts(ts)
+                    if bound is not None and not ts > bound:
+                        continue
+                    if until is not None and not ts <= until:
+                        continue
+                    if projection:
+                        record = {col: record.get(col) for col in projection}
+                    yield record
+            records = lake_records()
+
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield self._to_frame(batch, projection)
+                batch = []
+        if batch:
+            yield self._to_frame(batch, projection)
 
     def clear_collection(self, collection_name):
         if not self.use_fallback:
             self.db[collection_name].drop()
             print(f"Cleared collection: {collection_name}")
         else:
-            file_path = os.path.join(Config.DATA_LAKE_DIR, f"{collection_name}.json")
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            for ext in ("jsonl", "jsonl.idx", "json"):
+                file_path = self._lake_path(collection_name, ext=ext)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
@@ -1,13 +1,33 @@
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-import random
+from scipy.signal import lfilter
+
+# Pollutant profiles shared by the generators: (base, trend per step, noise level)
+POLLUTANTS = {
+    "pm25": (30, 0.005, 5),
+    "pm10": (50, 0.005, 8),
+    "no2": (20, 0.002, 4),
+    "o3": (40, -0.001, 6),
+}
+
+DEFAULT_LOCATIONS = [
+    "Hanoi, Vietnam",
+    "Ho Chi Minh City, Vietnam",
+    "Da Nang, Vietnam",
+    "Hai Phong, Vietnam",
+    "Can Tho, Vietnam",
+]
 
 class DataGenerator:
-    def __init__(self, n_samples=5000, start_date='2023-01-01', freq='H'):
+    def __init__(self, n_samples=5000, start_date='2023-01-01', freq='h', seed=None,
+                 missing_rate=0.05, spike_rate=0.01):
         self.n_samples = n_samples
         self.start_date = start_date
         self.freq = freq
+        self.missing_rate = missing_rate
+        self.spike_rate = spike_rate
+        # Same seed -> same dataset (noise, gaps and spikes)
+        self.rng = np.random.default_rng(seed)
 
     def generate_series(self, base, trend, seasonality, noise_level):
         """
@@ -15,61 +35,180 @@ class DataGenerator:
         Y_t = Base + Trend*t + Seasonality + Noise
         """
         time = np.arange(self.n_samples)
-        trend_component = list(map(lambda t: t * trend, time))
-        
+        series = base + trend * time
+
         # Seasonality: Daily (24h) and Weekly (168h) cycles if hourly
-        seasonal_component = list(map(lambda t: 10 * np.sin(2 * np.pi * t / 24) + \
-                                                5 * np.cos(2 * np.pi * t / 168), time))
-        
-        noise = np.random.normal(0, noise_level, self.n_samples)
-        
-        series = base + np.array(trend_component) + np.array(seasonal_component) + noise
+        if seasonality:
+            series = series + 10 * np.sin(2 * np.pi * time / 24) + 5 * np.cos(2 * np.pi * time / 168)
+
+        series = series + self.rng.normal(0, noise_level, self.n_samples)
         return np.maximum(series, 0) # Ensure no negative values for pollution
 
-    def create_dataset(self):
-        print("Generating synthetic Air Quality data...")
-        
-        # PM2.5: Moderate trend, strong daily seasonality
-        pm25 = self.generate_series(base=30, trend=0.005, seasonality=True, noise_level=5)
-        
-        # PM10: Higher base, similar trend
-        pm10 = self.generate_series(base=50, trend=0.005, seasonality=True, noise_level=8)
-        
-        # NO2: Traffic related, sharp peaks
-        no2 = self.generate_series(base=20, trend=0.002, seasonality=True, noise_level=4)
-        
-        # O3: Inverse correlation with NO2 often, but here just independent cyclicity
-        o3 = self.generate_series(base=40, trend=-0.001, seasonality=True, noise_level=6)
-
-        
+    def create_frame(self):
+        """
+        Columnar version of the dataset (one column per field).
+        """
+        # Daily/weekly seasonality on top of each pollutant's profile
+        series = {name: self.generate_series(base=base, trend=trend, seasonality=True, noise_level=noise)
+                  for name, (base, trend, noise) in POLLUTANTS.items()}
+        pm25 = series["pm25"]
+
         # Add realistic noise/anomalies
         # 1. Random NaNs (Sensor failure)
-        nan_indices = random.sample(range(self.n_samples), int(self.n_samples * 0.05)) # 5% missing
-        for i in nan_indices:
-            pm25[i] = np.nan
-        
+        nan_indices = self.rng.choice(self.n_samples, int(self.n_samples * self.missing_rate), replace=False)
+        pm25[nan_indices] = np.nan
+
         # 2. Random Spikes (Sensor malfunction or localized smoke)
-        spike_indices = random.sample(range(self.n_samples), int(self.n_samples * 0.01)) # 1% outliers
-        for i in spike_indices:
-            pm25[i] = pm25[i] * random.uniform(3, 5) # 3x-5x spikes
+        spike_indices = self.rng.choice(self.n_samples, int(self.n_samples * self.spike_rate), replace=False)
+        pm25[spike_indices] *= self.rng.uniform(3, 5, len(spike_indices)) # 3x-5x spikes
 
         date_range = pd.date_range(start=self.start_date, periods=self.n_samples, freq=self.freq)
-        
-        data = []
-        for i, date in enumerate(date_range):
-            record = {
-                "timestamp": date.isoformat(),
-                "pm25": float(pm25[i]) if not np.isnan(pm25[i]) else None, # JSON standard for NaN is null
-                "pm10": float(pm10[i]),
-                "no2": float(no2[i]),
-                "o3": float(o3[i]),
-                "sensor_id": "VN_HANOI_001",
-                "location": "Hanoi, Vietnam"
-            }
-            data.append(record)
-            
-        print(f"Generated {len(data)} samples (with 5% simulated missing values).")
-        return data
+
+        return pd.DataFrame({
+            "timestamp": np.datetime_as_string(date_range.values, unit='s'),
+            **series,
+            "sensor_id": pd.Categorical(["VN_HANOI_001"]).repeat(self.n_samples),
+            "location": pd.Categorical(["Hanoi, Vietnam"]).repeat(self.n_samples)
+        })
+
+    def create_dataset(self, output='records'):
+        """
+        output: 'records' (list of dicts, NaN -> None), 'frame' (DataFrame)
+                or 'arrow' (pyarrow.Table).
+        """
+        print("Generating synthetic Air Quality data...")
+        df = self.create_frame()
+        print(f"Generated {len(df)} samples (with {self.missing_rate:.0%} simulated missing values).")
+
+        if output == 'frame':
+            return df
+        if output == 'arrow':
+            import pyarrow as pa
+            return pa.Table.from_pandas(df, preserve_index=False)
+        if output != 'records':
+            raise ValueError(f"Unknown output format: {output}")
+
+        # JSON standard for NaN is null
+        records = df.astype({"pm25": object, "sensor_id": str, "location": str})
+        records["pm25"] = records["pm25"].where(df["pm25"].notna(), None)
+        return records.to_dict('records')
+
+class FleetGenerator:
+    """
+    Multi-sensor, multi-site synthetic stream for scale testing.
+    Sensors at the same location share a regional AR(1) signal (weather, haze)
+    on top of their own offset, gain, phase and noise, so they are correlated
+    but distinct. Data is emitted in time chunks, so the whole fleet never
+    sits in memory.
+    """
+    def __init__(self, n_sensors=100, locations=5, n_steps=8760, start_date='2023-01-01', freq='h', seed=None,
+                 missing_rate=0.05, spike_rate=0.01, max_clock_skew=0, late_rate=0.0, max_delay=6,
+                 regional_phi=0.95):
+        """
+        locations: number of sites or a list of location names.
+        max_clock_skew: max per-sensor clock offset, in seconds.
+        late_rate / max_delay: share of readings delivered 1..max_delay steps late,
+        which makes them arrive out of order in a later chunk.
+        """
+        if isinstance(locations, int):
+            extra = [f"Site {i}, Vietnam" for i in range(len(DEFAULT_LOCATIONS) + 1, locations + 1)]
+            locations = (DEFAULT_LOCATIONS + extra)[:locations]
+        self.locations = list(locations)
+        self.n_sensors = n_sensors
+        self.n_steps = n_steps
+        self.times = pd.date_range(start=start_date, periods=n_steps, freq=freq).values
+        self.missing_rate = missing_rate
+        self.spike_rate = spike_rate
+        self.late_rate = late_rate
+        self.max_delay = max_delay
+        self.regional_phi = regional_phi
+        self.rng = np.random.default_rng(seed)
+
+        # Sensors are spread round-robin over locations: VN_HANOI_001, VN_HO_CHI_MINH_CITY_001, ...
+        self.sensor_location = np.arange(n_sensors) % len(self.locations)
+        self.sensor_ids = []
+        for i, loc in enumerate(self.sensor_location):
+            site = self.locations[loc].split(',')[0].upper().replace(' ', '_')
+            self.sensor_ids.append(f"VN_{site}_{i // len(self.locations) + 1:03d}")
+
+        # Per-sensor characteristics (fixed for the whole run)
+        self.clock_skew = self.rng.uniform(-max_clock_skew, max_clock_skew, n_sensors).astype('timedelta64[s]')
+        self.phase = self.rng.uniform(-2, 2, n_sensors)
+        self.level = {p: self.rng.uniform(0.8, 1.2, n_sensors) for p in POLLUTANTS}
+        self.gain = {p: self.rng.uniform(0.7, 1.3, n_sensors) for p in POLLUTANTS}
+
+    @property
+    def n_rows(self):
+        return self.n_sensors * self.n_steps
+
+    def _chunk(self, start, stop, regional_state):
+        """
+        Readings for steps [start, stop) of every sensor, step-major.
+        """
+        steps = np.arange(start, stop)
+        t = steps[:, None]
+        shape = (len(steps), self.n_sensors)
+        data = {}
+
+        for name, (base, trend, noise_level) in POLLUTANTS.items():
+            # Regional signal per location, continued from the previous chunk
+            eps = self.rng.normal(0, noise_level, (len(steps), len(self.locations)))
+            regional, regional_state[name] = lfilter([1], [1, -self.regional_phi], eps, axis=0, zi=regional_state[name])
+
+            seasonal = 10 * np.sin(2 * np.pi * (t + self.phase) / 24) + 5 * np.cos(2 * np.pi * t / 168)
+            series = (base * self.level[name] + trend * t + seasonal
+                      + self.gain[name] * regional[:, self.sensor_location]
+                      + self.rng.normal(0, noise_level / 2, shape))
+            series = np.maximum(series, 0)
+
+            # Sensor failures and spikes
+            series[self.rng.random(shape) < self.missing_rate] = np.nan
+            if name == "pm25":
+                spikes = self.rng.random(shape) < self.spike_rate
+                series[spikes] *= self.rng.uniform(3, 5, spikes.sum())
+            data[name] = series.ravel()
+
+        # Timestamps as reported by each sensor's (skewed) clock
+        timestamps = self.times[steps][:, None] + self.clock_skew[None, :]
+        sensor_codes = np.tile(np.arange(self.n_sensors), len(steps))
+
+        df = pd.DataFrame({
+            "timestamp": np.datetime_as_string(timestamps.ravel(), unit='s'),
+            **data,
+            "sensor_id": pd.Categorical.from_codes(sensor_codes, categories=self.sensor_ids),
+            "location": pd.Categorical.from_codes(self.sensor_location[sensor_codes], categories=self.locations),
+        })
+
+        # Step at which each reading reaches ingestion
+        arrival = np.repeat(steps, self.n_sensors)
+        late = self.rng.random(len(df)) < self.late_rate
+        arrival[late] += self.rng.integers(1, self.max_delay + 1, late.sum())
+        df["_arrival"] = arrival
+        return df
+
+    def iter_chunks(self, chunk_steps=24):
+        """
+        Yields DataFrames in arrival order, one per `chunk_steps` time steps
+        (plus a final one for readings delayed past the end of the run).
+        """
+        regional_state = {p: np.zeros((1, len(self.locations))) for p in POLLUTANTS}
+        pending = None
+
+        for start in range(0, self.n_steps, chunk_steps):
+            stop = min(start + chunk_steps, self.n_steps)
+            df = self._chunk(start, stop, regional_state)
+            if pending is not None:
+                df = pd.concat([pending, df], ignore_index=True)
+
+            ready = df["_arrival"] < stop
+            pending = df[~ready]
+            yield df[ready].sort_values("_arrival", kind="stable").drop(columns="_arrival").reset_index(drop=True)
+
+        if pending is not None and len(pending):
+            yield pending.sort_values("_arrival", kind="stable").drop(columns="_arrival").reset_index(drop=True)
+
+    def __iter__(self):
+        return self.iter_chunks()
 
 if __name__ == "__main__":
     gen = DataGenerator()
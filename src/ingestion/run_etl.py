@@ -1,20 +1,27 @@
-from .generator import DataGenerator
-from db_client import MongoDBClient
 import pandas as pd
 import sys
 import os
 
+# Runs as a script, as `python -m src.ingestion.run_etl` or imported from main.py
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generator import DataGenerator
+from db_client import MongoDBClient
 from config import Config
-from src.processing.cleaner import DataCleaner
+from processing.cleaner import DataCleaner
+from processing.warehouse import Warehouse
+from processing.rollups import RollupStore
+
+def run_etl(incremental=False, lookback_hours=None):
+    if incremental:
+        return run_incremental_etl(lookback_hours)
 
-def run_etl():
     print(">>> Starting Enterprise ETL Pipeline...")
     
     # 1. Ingestion: Simulate Sensor Stream -> Data Lake (Raw)
     print("\n[Step 1] Ingesting Data to Data Lake...")
-    gen = DataGenerator(n_samples=Config.N_SAMPLES, start_date=Config.START_DATE)
-    data = gen.create_dataset()
+    gen = DataGenerator(n_samples=Config.N_SAMPLES, start_date=Config.START_DATE, seed=Config.RANDOM_SEED)
+    data = gen.create_dataset(output='frame')
     
     mongo = MongoDBClient()
     mongo.clear_collection(Config.COLLECTION_RAW)
@@ -22,7 +29,9 @@ def run_etl():
     
     # 2. Processing: Data Lake -> Data Warehouse (Cleaned)
     print("\n[Step 2] Processing & Cleaning...")
-    df_raw = pd.DataFrame(data)
+    # Read back from the Data Lake chunk by chunk (DataFrames, not per-row dicts)
+    chunks = mongo.fetch_iter(Config.COLLECTION_RAW)
+    df_raw = pd.concat(chunks, ignore_index=True)
     
     cleaner = DataCleaner()
     
@@ -34,8 +43,88 @@ def run_etl():
     
     # Save to Parquet (Warehouse)
     cleaner.save_processed(df_clean, filename=f"{Config.COLLECTION_PROCESSED}.parquet")
+    Warehouse().update_watermarks(df_clean)
+    # Dashboard aggregates (hour/day/week) of the rebuilt warehouse
+    RollupStore().rebuild(df_clean)
     
     print("\n>>> ETL Complete. Data ready in Warehouse.")
 
+def run_incremental_etl(lookback_hours=None):
+    """
+    Processes only raw records newer than each sensor's watermark and appends
+    them to the Warehouse. `lookback_hours` of already-processed readings are
+    re-read as context for imputation but not written again.
+    Sensors without a watermark are read from the beginning. Readings that
+    arrive late (at or before the watermark, within the look-back) and are
+    not in the Warehouse yet are merged; later than that they are not seen.
+    """
+    print(">>> Starting Incremental ETL Pipeline...")
+    lookback = pd.Timedelta(hours=Config.ETL_LOOKBACK_HOURS if lookback_hours is None else lookback_hours)
+
+    warehouse = Warehouse()
+    watermarks = warehouse.load_watermarks()
+    context_start = {sensor: (pd.Timestamp(ts) - lookback).isoformat() for sensor, ts in watermarks.items()}
+    print(f"Watermarks for {len(watermarks)} sensors, re-reading {lookback} of context each "
+          f"(sensors without one from the beginning)")
+
+    # 1. Extract: new raw records (plus look-back context) chunk by chunk, per-sensor lower bound
+    mongo = MongoDBClient()
+    chunks = list(mongo.fetch_iter(Config.COLLECTION_RAW, since=context_start))
+    df_raw = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    if df_raw.empty:
+        print(">>> No new raw records. Warehouse is up to date.")
+        return None
+
+    sensors = df_raw['sensor_id'].astype(str)
+    new_mask = (df_raw['timestamp'] > sensors.map(watermarks).fillna('')).to_numpy()
+    late_mask = _late_rows(warehouse, df_raw, new_mask, context_start)
+    write_mask = new_mask | late_mask
+    if not write_mask.any():
+        print(">>> No new raw records. Warehouse is up to date.")
+        return None
+
+    # 2. Transform with context, keep only the rows to write
+    cleaner = DataCleaner()
+    df_clean = cleaner.handle_missing_values(df_raw)
+    df_new = df_clean[write_mask]
+
+    # 3. Load: append a new part, then advance the watermarks
+    cleaner.save_processed(df_new, filename=f"{Config.COLLECTION_PROCESSED}.parquet", append=True)
+    warehouse.update_watermarks(df_new)
+    warehouse.compact()
+    rollups = RollupStore()
+    if rollups.exists():
+        rollups.update(df_new)
+    else:
+        # First run since rollups were introduced: backfill from the whole warehouse
+        rollups.rebuild(warehouse.read(columns=['sensor_id', 'timestamp'] + Config.POLLUTANTS))
+
+    print(f"\n>>> Incremental ETL Complete. {int(new_mask.sum())} new records, {int(late_mask.sum())} late records merged "
+          f"({len(df_raw) - len(df_new)} context rows re-read).")
+    return df_new
+
+def _late_rows(warehouse, df_raw, new_mask, context_start):
+    """
+    Marks the rows at or before their sensor's watermark that the Warehouse
+    does not hold yet (readings delivered late).
+    """
+    late = ~new_mask
+    if not late.any():
+        return late
+    old = df_raw[late]
+    stored = warehouse.read(columns=['sensor_id', 'timestamp'], start=min(context_start.values()),
+                            sensors=sorted(old['sensor_id'].astype(str).unique()))
+    stored_keys = set()
+    if stored is not None and not stored.empty:
+        stored_keys = set(zip(stored['sensor_id'].astype(str), pd.to_datetime(stored['timestamp'])))
+    keys = zip(old['sensor_id'].astype(str), pd.to_datetime(old['timestamp']))
+    late[late] = [key not in stored_keys for key in keys]
+    return late
+
 if __name__ == "__main__":
-    run_etl()
+    import argparse
+    parser = argparse.ArgumentParser(description="Data Lake -> Data Warehouse ETL")
+    parser.add_argument("--incremental", action="store_true", help="Process only records newer than the watermarks")
+    parser.add_argument("--lookback-hours", type=int, default=None, help="Context re-read for imputation")
+    args = parser.parse_args()
+    run_etl(incremental=args.incremental, lookback_hours=args.lookback_hours)
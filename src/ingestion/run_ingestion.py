@@ -11,7 +11,7 @@ def main():
     print(">>> Starting Data Ingestion Pipeline...")
     
     # 1. Generate Data
-    gen = DataGenerator(n_samples=Config.N_SAMPLES, start_date=Config.START_DATE)
+    gen = DataGenerator(n_samples=Config.N_SAMPLES, start_date=Config.START_DATE, seed=Config.RANDOM_SEED)
     data = gen.create_dataset()
     
     # 2. Ingest to Mongo
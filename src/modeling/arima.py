@@ -1,9 +1,11 @@
 import pandas as pd
+import numpy as np
 from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
-import matplotlib.pyplot as plt
 import os
 import joblib
+from joblib import Parallel, delayed
+import warnings
+import json
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -19,6 +21,10 @@ class ArimaModel:
         """
         Generates ACF and PACF plots for order selection
         """
+        # Plotting libraries are only needed here (keeps pool workers light)
+        from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
+        import matplotlib.pyplot as plt
+
         fig, axes = plt.subplots(1, 2, figsize=(16, 6))
         plot_acf(series, ax=axes[0])
         plot_pacf(series, ax=axes[1])
@@ -28,17 +34,177 @@ class ArimaModel:
         plt.savefig(output_path)
         print(f"ACF/PACF plots saved to {output_path}")
 
-    def train(self, train_data):
+    def train(self, train_data, start_params=None, verbose=False, save=True):
+        """
+        start_params: warm start from previously fitted parameters.
+        verbose: print the full statsmodels summary.
+        save=False keeps the fit in memory only (e.g. backtest folds).
+        """
         print(f"Training ARIMA with order {self.order}...")
         self.model = ARIMA(train_data, order=self.order)
-        self.fit_model = self.model.fit()
-        print(self.fit_model.summary())
+        self.fit_model = self.model.fit(start_params=start_params)
+        if verbose:
+            print(self.fit_model.summary())
+        else:
+            print(f"ARIMA{self.order}: AIC={self.fit_model.aic:.1f}, nobs={self.fit_model.nobs}")
         
-        model_path = os.path.join(Config.MODEL_DIR, "arima_model.pkl")
-        joblib.dump(self.fit_model, model_path)
-        print("ARIMA model saved.")
+        if save:
+            model_path = os.path.join(Config.MODEL_DIR, "arima_model.pkl")
+            joblib.dump(self.fit_model, model_path)
+            print("ARIMA model saved.")
 
     def predict(self, steps):
         if not self.fit_model:
             raise ValueError("Model not trained yet.")
         return self.fit_model.forecast(steps=steps)
+
+def _hourly_series(df, target):
+    """
+    One sensor's readings as a regular hourly series (gaps become NaN,
+    which the state-space ARIMA handles natively).
+    """
+    series = pd.Series(df[target].to_numpy(dtype=float), index=pd.DatetimeIndex(pd.to_datetime(df['timestamp'])))
+    series = series[~series.index.duplicated(keep='last')].sort_index()
+    return series.asfreq('h')
+
+def _fit_order(series, order, start_params=None, maxiter=None):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        method_kwargs = {'maxiter': maxiter} if maxiter else None
+        return ARIMA(series, order=order).fit(start_params=start_params, method_kwargs=method_kwargs)
+
+def _fit_sensor(series, orders, previous, search, prune_iter, prune_keep):
+    """
+    Fits one sensor. Returns its compact record (order, params, AIC, ...).
+    Search: every candidate order gets a short fit (prune_iter optimizer
+    iterations); only the best prune_keep are fitted to convergence,
+    continuing from their partial parameters.
+    Warm start: the previous run's order/params seed the fit.
+    """
+    orders = [tuple(o) for o in orders]
+    prev_order = tuple(previous['order']) if previous else None
+    prev_params = np.asarray(previous['params']) if previous else None
+
+    if not search:
+        candidates = {prev_order or orders[0]: prev_params if prev_order else None}
+    else:
+        if prev_order is not None and prev_order not in orders:
+            orders = [prev_order] + orders
+        starts = {order: (prev_params if order == prev_order else None) for order in orders}
+        if len(orders) > prune_keep:
+            scores = []
+            for order in orders:
+                try:
+                    partial = _fit_order(series, order, starts[order], maxiter=prune_iter)
+                except Exception:
+                    continue
+                scores.append((partial.aic, order, partial.params.to_numpy()))
+            candidates = {order: params for _, order, params in sorted(scores, key=lambda s: s[0])[:prune_keep]}
+        else:
+            candidates = starts
+
+    best = None
+    for order, start_params in candidates.items():
+        try:
+            result = _fit_order(series, order, start_params)
+        except Exception:
+            continue
+        if best is None or result.aic < best.aic:
+            best = result
+    if best is None:
+        return None
+
+    return {
+        "order": list(best.model.order),
+        "params": [float(v) for v in best.params],
+        "aic": float(best.aic),
+        "nobs": int(best.nobs),
+        "last_timestamp": series.index[-1].isoformat(),
+        "warm_start": best.model.order == prev_order,
+    }
+
+def _forecast_sensor(series, record, steps):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        # Parameters are fixed: filtering the recent context only runs the Kalman filter
+        result = ARIMA(series, order=tuple(record['order'])).filter(np.asarray(record['params']))
+        return result.forecast(steps=steps).to_numpy()
+
+class ArimaBatchTrainer:
+    """
+    One ARIMA per sensor, fitted in a process pool.
+    Fitted orders/parameters are kept in a compact JSON store
+    ({sensor_id: {"order", "params", "aic", ...}}) instead of pickled
+    result objects, and the next run warm-starts from them. Forecasts
+    rebuild each model from its parameters plus the recent readings.
+    """
+    def __init__(self, orders=None, n_jobs=None, store_path=None, target='pm25'):
+        self.orders = [tuple(o) for o in (orders or Config.ARIMA_ORDERS)]
+        self.n_jobs = Config.ARIMA_N_JOBS if n_jobs is None else n_jobs
+        self.store_path = store_path or os.path.join(Config.MODEL_DIR, "arima_params.json")
+        self.target = target
+        self.params = self.load()
+
+    def load(self):
+        if not os.path.isfile(self.store_path):
+            return {}
+        with open(self.store_path, 'r') as f:
+            return json.load(f)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.store_path), exist_ok=True)
+        tmp_path = f"{self.store_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.params, f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_path, self.store_path)
+        return self.store_path
+
+    def _sensor_series(self, df, max_obs=None):
+        for sensor_id, group in df.groupby('sensor_id', observed=True, sort=True):
+            series = _hourly_series(group, self.target)
+            yield str(sensor_id), (series.iloc[-max_obs:] if max_obs else series)
+
+    def fit(self, df, search=False, warm_start=True, max_obs=None):
+        """
+        Fits every sensor in df (columns: sensor_id, timestamp, target) on its
+        last max_obs hourly points, then saves the store.
+        search: choose the order per sensor among self.orders (with pruning).
+        Returns {sensor_id: record}.
+        """
+        max_obs = max_obs or Config.ARIMA_MAX_OBS
+        print(f"Fitting ARIMA for {df['sensor_id'].nunique()} sensors (search={search}, warm_start={warm_start})...")
+        jobs = list(self._sensor_series(df, max_obs))
+        results = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_sensor)(series, self.orders, self.params.get(sensor_id) if warm_start else None,
+                                 search, Config.ARIMA_PRUNE_ITER, Config.ARIMA_PRUNE_KEEP)
+            for sensor_id, series in jobs
+        )
+
+        fitted = {}
+        for (sensor_id, _), record in zip(jobs, results):
+            if record is None:
+                print(f"Warning: ARIMA fit failed for {sensor_id}")
+                continue
+            fitted[sensor_id] = record
+        self.params.update(fitted)
+        self.save()
+        warm = sum(r['warm_start'] for r in fitted.values())
+        print(f"ARIMA fitted for {len(fitted)}/{len(jobs)} sensors ({warm} warm-started), saved to {self.store_path}")
+        return fitted
+
+    def predict(self, df, steps=None, context=None):
+        """
+        Forecasts `steps` hours after the last reading of every sensor in df
+        that has fitted parameters. Returns a DataFrame indexed by forecast
+        time with one column per sensor.
+        """
+        steps = steps or Config.FORECAST_HORIZON
+        context = context or Config.ARIMA_PREDICT_CONTEXT
+        jobs = [(sensor_id, series) for sensor_id, series in self._sensor_series(df, context) if sensor_id in self.params]
+        forecasts = Parallel(n_jobs=self.n_jobs)(
+            delayed(_forecast_sensor)(series, self.params[sensor_id], steps) for sensor_id, series in jobs
+        )
+        return pd.DataFrame({
+            sensor_id: pd.Series(values, index=pd.date_range(series.index[-1] + pd.Timedelta(hours=1), periods=steps, freq='h'))
+            for (sensor_id, series), values in zip(jobs, forecasts)
+        })
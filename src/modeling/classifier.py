@@ -10,27 +10,14 @@ import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
+from modeling.risk import label_risk
 
 class AirQualityClassifier:
     def __init__(self):
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         
-    def _get_label(self, pm25):
-        if pm25 <= Config.RISK_THRESHOLDS["Safe"]:
-            return "Safe"
-        elif pm25 <= Config.RISK_THRESHOLDS["Normal"]:
-            return "Normal"
-        elif pm25 <= Config.RISK_THRESHOLDS["Moderate"]:
-            return "Moderate"
-        elif pm25 <= Config.RISK_THRESHOLDS["Light Pollution"]:
-            return "Light Pollution"
-        elif pm25 <= Config.RISK_THRESHOLDS["Heavy Pollution"]:
-            return "Heavy Pollution"
-        else:
-            return "Red Alert"
-
     def prepare_labels(self, df):
-        df['risk_label'] = df['pm25'].apply(self._get_label)
+        df['risk_label'] = label_risk(df['pm25'])
         return df
 
     def train(self, X, y):
@@ -32,31 +32,143 @@ class LstmModel:
         model.compile(optimizer='adam', loss='mse')
         return model
 
-    def train(self, X_train, y_train, validation_data=None):
+    @staticmethod
+    def _window_dataset(values, seq_len, target_idx, starts, batch_size, shuffle=False, seed=None):
+        """
+        Batched (window, target) pairs for the given window start rows.
+        Only start indices are shuffled; windows are gathered per batch on the fly.
+        """
+        offsets = tf.range(seq_len, dtype=tf.int64)
+        targets = values[:, target_idx]
+
+        def to_windows(starts):
+            rows = starts[:, None] + offsets[None, :]
+            return tf.gather(values, rows), tf.gather(targets, starts + seq_len)
+
+        ds = tf.data.Dataset.from_tensor_slices(tf.constant(starts, dtype=tf.int64))
+        if shuffle:
+            ds = ds.shuffle(max(len(starts), 1), seed=seed, reshuffle_each_iteration=True)
+        ds = ds.batch(batch_size).map(to_windows, num_parallel_calls=tf.data.AUTOTUNE)
+        return ds.prefetch(tf.data.AUTOTUNE)
+
+    @staticmethod
+    def _split_starts(sensors, n_rows, seq_len, val_split):
+        """
+        Window start rows for training and validation. Windows stay within one
+        run of rows of the same sensor, and each sensor is split by time:
+        its last `val_split` of windows go to validation.
+        """
+        if sensors is None:
+            bounds = [(0, n_rows)]
+        else:
+            sensors = np.asarray(sensors)
+            changes = np.flatnonzero(sensors[1:] != sensors[:-1]) + 1
+            bounds = zip(np.r_[0, changes], np.r_[changes, n_rows])
+        train, val = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        for first, last in bounds:
+            n_windows = last - first - seq_len
+            if n_windows <= 0:
+                continue
+            split_idx = first + int(n_windows * (1 - val_split))
+            train.append(np.arange(first, split_idx))
+            val.append(np.arange(split_idx, first + n_windows))
+        return np.concatenate(train), np.concatenate(val)
+
+    @classmethod
+    def make_datasets(cls, data, seq_len, target='pm25', val_split=None, batch_size=None, seed=None, sensors=None):
+        """
+        Streaming train/validation feeds built from a scaled frame.
+        Memory stays at rows x features instead of rows x seq_len x features.
+        sensors: sensor id per row (rows grouped by sensor, in time order), so
+        no window spans two sensors. The split is by time within each sensor:
+        the last `val_split` of its windows are used for validation.
+        """
+        val_split = Config.LSTM_VAL_SPLIT if val_split is None else val_split
+        batch_size = batch_size or Config.LSTM_BATCH_SIZE
+        seed = Config.RANDOM_SEED if seed is None else seed
+
+        target_idx = data.columns.get_loc(target) if isinstance(target, str) else target
+        values = tf.constant(np.asarray(data, dtype=np.float32))
+        train_starts, val_starts = cls._split_starts(sensors, len(data), seq_len, val_split)
+
+        train_ds = cls._window_dataset(values, seq_len, target_idx, train_starts, batch_size, shuffle=True, seed=seed)
+        val_ds = cls._window_dataset(values, seq_len, target_idx, val_starts, batch_size)
+        return train_ds, val_ds
+
+    def train(self, X_train, y_train=None, validation_data=None, epochs=None, save=True, verbose=1):
+        """
+        X_train/y_train: arrays, or a batched tf.data.Dataset of (window, target)
+        pairs with y_train=None (see make_datasets).
+        save=False keeps the model in memory only (e.g. backtest folds).
+        """
         print("Training LSTM Model (Advanced)...")
         
         # Callbacks
         callbacks = [
-            tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True),
-            tf.keras.callbacks.ModelCheckpoint(
+            tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
+        ]
+        if save:
+            callbacks.append(tf.keras.callbacks.ModelCheckpoint(
                 filepath=os.path.join(Config.MODEL_DIR, "lstm_best.keras"),
                 monitor='val_loss',
                 save_best_only=True
-            )
-        ]
+            ))
+        
+        # Datasets are already batched
+        batch_size = Config.LSTM_BATCH_SIZE if y_train is not None else None
         
         history = self.model.fit(
             X_train, y_train,
-            epochs=Config.LSTM_EPOCHS,
-            batch_size=Config.LSTM_BATCH_SIZE,
+            epochs=epochs or Config.LSTM_EPOCHS,
+            batch_size=batch_size,
             validation_data=validation_data,
             callbacks=callbacks,
-            verbose=1
+            verbose=verbose
         )
-        # self.model.save(os.path.join(Config.MODEL_DIR, "lstm_model.h5")) # Legacy
-        self.model.save(os.path.join(Config.MODEL_DIR, "lstm_model.keras"))
-        print("LSTM model saved.")
+        if save:
+            # self.model.save(os.path.join(Config.MODEL_DIR, "lstm_model.h5")) # Legacy
+            self.model.save(os.path.join(Config.MODEL_DIR, "lstm_model.keras"))
+            print("LSTM model saved.")
         return history
 
     def predict(self, X):
         return self.model.predict(X)
+
+    @staticmethod
+    def export_numpy(model, path):
+        """
+        Exports a trained Keras model (or .keras/.h5 path) to an .npz of raw weights
+        for the TensorFlow-free runtime (serving.lstm_runtime.NumpyLstm).
+        Supports stacked LSTM (tanh/sigmoid), Dropout (identity at inference)
+        and Dense layers, i.e. what _build_model creates.
+        """
+        if isinstance(model, str):
+            model = tf.keras.models.load_model(model)
+
+        arrays, kinds = {}, []
+        for layer in model.layers:
+            config = layer.get_config()
+            name = type(layer).__name__
+            if name == 'Dropout':
+                continue
+            i = len(kinds)
+            if name == 'LSTM':
+                if config['activation'] != 'tanh' or config['recurrent_activation'] != 'sigmoid' or config.get('go_backwards'):
+                    raise ValueError(f"Unsupported LSTM configuration in layer {layer.name}")
+                # Gate order in the weight columns: input, forget, cell, output
+                kernel, recurrent, bias = layer.get_weights()
+                arrays.update({f'layer{i}_kernel': kernel, f'layer{i}_recurrent': recurrent, f'layer{i}_bias': bias,
+                               f'layer{i}_return_sequences': np.array(config['return_sequences'])})
+            elif name == 'Dense':
+                if config['activation'] not in ('linear', 'relu'):
+                    raise ValueError(f"Unsupported Dense activation in layer {layer.name}: {config['activation']}")
+                kernel, bias = layer.get_weights()
+                arrays.update({f'layer{i}_kernel': kernel, f'layer{i}_bias': bias,
+                               f'layer{i}_activation': np.array(config['activation'])})
+            else:
+                raise ValueError(f"Layer type {name} cannot be exported")
+            kinds.append(name.lower())
+
+        np.savez(path, layers=np.array(kinds), input_shape=np.array(model.input_shape[1:]), **arrays)
+        print(f"LSTM weights exported to {path}")
+        return path
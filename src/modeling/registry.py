@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+import hashlib
+import shutil
+import uuid
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+class ModelRegistry:
+    """
+    Local registry of model bundles (scaler + LSTM + RF trained together):
+        registry/<version>/{artifacts..., manifest.json}
+        registry/CURRENT   -> name of the promoted version
+    Versions are immutable once published; promoting only rewrites CURRENT
+    (atomic rename), so readers always see one complete, consistent bundle.
+    """
+    MANIFEST = "manifest.json"
+    POINTER = "CURRENT"
+
+    def __init__(self, root=None):
+        self.root = root or Config.MODEL_REGISTRY_DIR
+
+    @staticmethod
+    def _checksum(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def path(self, version):
+        return os.path.join(self.root, version)
+
+    def versions(self):
+        """
+        Published versions, oldest first.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isfile(os.path.join(self.root, name, self.MANIFEST)))
+
+    def manifest(self, version):
+        with open(os.path.join(self.path(version), self.MANIFEST), 'r') as f:
+            return json.load(f)
+
+    def current(self):
+        """
+        Promoted version, or None if nothing was promoted yet.
+        """
+        try:
+            with open(os.path.join(self.root, self.POINTER), 'r') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, artifacts, metadata=None):
+        """
+        Copies artifacts ({file name in bundle: source path}) into a new version.
+        The version directory only appears once complete.
+        """
+        created = datetime.now(timezone.utc)
+        version = f"v{created.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = os.path.join(self.root, f".{version}.tmp")
+        os.makedirs(tmp_dir)
+
+        files = {}
+        for name, source in artifacts.items():
+            target = os.path.join(tmp_dir, name)
+            shutil.copy2(source, target)
+            files[name] = {"sha256": self._checksum(target), "bytes": os.path.getsize(target)}
+
+        manifest = {"version": version, "created_at": created.isoformat(), "files": files, "metadata": metadata or {}}
+        with open(os.path.join(tmp_dir, self.MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_dir, self.path(version))
+        print(f"Published model bundle {version} ({', '.join(files)})")
+        return version
+
+    def verify(self, version):
+        """
+        Raises ValueError if an artifact is missing or does not match its checksum.
+        """
+        for name, info in self.manifest(version)["files"].items():
+            path = os.path.join(self.path(version), name)
+            if not os.path.isfile(path) or self._checksum(path) != info["sha256"]:
+                raise ValueError(f"Model bundle {version}: artifact {name} is missing or corrupted")
+
+    def promote(self, version):
+        """
+        Makes `version` the one served; running APIs pick it up on their next poll.
+        """
+        self.verify(version)
+        pointer = os.path.join(self.root, self.POINTER)
+        tmp_path = f"{pointer}.tmp-{uuid.uuid4().hex[:6]}"
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, pointer)
+        print(f"Promoted model bundle {version}")
+        self.prune()
+        return version
+
+    def prune(self, keep=None):
+        """
+        Deletes the oldest versions beyond `keep` (never the current one).
+        """
+        keep = keep or Config.MODEL_REGISTRY_KEEP
+        current = self.current()
+        old = [v for v in self.versions() if v != current]
+        old = old[:max(len(old) - keep, 0)]
+        for version in old:
+            shutil.rmtree(self.path(version), ignore_errors=True)
+        return old
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+def risk_levels(thresholds=None):
+    """
+    Risk category names, from cleanest to most polluted.
+    """
+    thresholds = thresholds or Config.RISK_THRESHOLDS
+    return sorted(thresholds, key=thresholds.get)
+
+def label_risk(pm25, thresholds=None):
+    """
+    Maps PM2.5 values to risk categories in one vectorized pass.
+    A value falls in the first category whose threshold it does not exceed;
+    anything above the second-highest threshold is the top category
+    (NaN included, as with the previous per-row labeler).
+    Returns an ordered pandas Categorical (a Series, with the same index, for Series input).
+    """
+    thresholds = thresholds or Config.RISK_THRESHOLDS
+    levels = risk_levels(thresholds)
+    edges = np.array([thresholds[level] for level in levels[:-1]], dtype=float)
+
+    values = np.asarray(pm25, dtype=float)
+    codes = np.searchsorted(edges, values, side='left')
+    labels = pd.Categorical.from_codes(codes.ravel(), categories=levels, ordered=True)
+    if isinstance(pm25, pd.Series):
+        return pd.Series(labels, index=pm25.index, name='risk_label')
+    return labels
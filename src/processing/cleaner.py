@@ -7,17 +7,24 @@ import sys
 # Config path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
+from processing.warehouse import Warehouse
+from processing.imputation import ImputationEngine
 
 class DataCleaner:
     def __init__(self):
         self.imputer = KNNImputer(n_neighbors=5)
 
-    def handle_missing_values(self, df):
+    def handle_missing_values(self, df, strategy=None):
         """
-        Imputes missing values using KNN.
-        Numeric columns only.
+        Imputes missing values in numeric columns.
+        strategy: 'interpolate', 'seasonal' or 'knn' (time-aware, per sensor, see ImputationEngine),
+                  or 'knn_full' for the legacy KNN over the whole matrix.
         """
-        print("Cleaning: Handling missing values...")
+        strategy = strategy or Config.IMPUTATION_STRATEGY
+        print(f"Cleaning: Handling missing values ({strategy})...")
+        if strategy != 'knn_full':
+            return ImputationEngine(strategy=strategy).transform(df)
+
         numeric_cols = df.select_dtypes(include=[np.number]).columns
         # Keep non-numeric to concat back later if needed, but for time series we mostly deal with numeric
         # Assuming 'timestamp' is index or separate
@@ -52,9 +59,11 @@ class DataCleaner:
             
         return df_clean
 
-    def save_processed(self, df, filename="clean_data.parquet"):
-        path = os.path.join(Config.DATA_WAREHOUSE_DIR, filename)
-        os.makedirs(Config.DATA_WAREHOUSE_DIR, exist_ok=True)
-        df.to_parquet(path)
-        print(f"Saved processed data to Data Warehouse: {path}")
-        return path
+    def save_processed(self, df, filename="clean_data.parquet", append=False):
+        """
+        Writes to the Data Warehouse dataset: full rebuild, or a new part when append=True.
+        """
+        warehouse = Warehouse(os.path.join(Config.DATA_WAREHOUSE_DIR, filename))
+        if append:
+            return warehouse.append(df)
+        return warehouse.write(df)
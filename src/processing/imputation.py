@@ -0,0 +1,95 @@
+import pandas as pd
+import numpy as np
+from sklearn.impute import KNNImputer
+from joblib import Parallel, delayed
+import os
+import sys
+
+# Config path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+class ImputationEngine:
+    """
+    Time-aware missing value imputation, run per sensor.
+    Strategies:
+        'interpolate': linear interpolation in time (edges filled from the nearest reading)
+        'seasonal':    value from one season earlier (e.g. same hour yesterday), then interpolation
+        'knn':         KNN restricted to a local time neighbourhood (chunks of `window` rows)
+    Sensors are independent, so they are imputed in parallel worker processes.
+    """
+    STRATEGIES = ('interpolate', 'seasonal', 'knn')
+
+    def __init__(self, strategy=None, n_jobs=None, window=None, season=None, n_neighbors=5):
+        self.strategy = strategy or Config.IMPUTATION_STRATEGY
+        if self.strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown imputation strategy '{self.strategy}', expected one of {self.STRATEGIES}")
+        self.n_jobs = n_jobs if n_jobs is not None else Config.IMPUTATION_N_JOBS
+        self.window = window or Config.IMPUTATION_WINDOW
+        self.season = pd.Timedelta(season or Config.IMPUTATION_SEASON)
+        self.n_neighbors = n_neighbors
+
+    def _interpolate(self, values):
+        method = 'time' if isinstance(values.index, pd.DatetimeIndex) else 'index'
+        return values.interpolate(method=method, limit_direction='both')
+
+    def _seasonal(self, values):
+        # Same time one season earlier (only where that reading exists)
+        previous = values.shift(freq=self.season)
+        previous = previous[~previous.index.duplicated(keep='last')].reindex(values.index)
+        return self._interpolate(values.fillna(previous))
+
+    def _knn(self, values):
+        """
+        KNN over overlapping time chunks: cost is O(rows x window) instead of O(rows^2).
+        """
+        imputer = KNNImputer(n_neighbors=self.n_neighbors, keep_empty_features=True)
+        data = values.to_numpy(dtype=float)
+        result = data.copy()
+        overlap = self.window // 4
+        for start in range(0, len(data), self.window):
+            stop = min(start + self.window, len(data))
+            if not np.isnan(data[start:stop]).any():
+                continue
+            # Neighbours come from the chunk plus some context on both sides
+            lo = max(start - overlap, 0)
+            block = data[lo:stop + overlap]
+            filled = imputer.fit_transform(block)
+            # Columns with no reading at all in the chunk are left to interpolation
+            filled[:, np.isnan(block).all(axis=0)] = np.nan
+            result[start:stop] = filled[start - lo:stop - lo]
+        return self._interpolate(pd.DataFrame(result, index=values.index, columns=values.columns))
+
+    def _impute_group(self, group, columns):
+        """
+        Imputes one sensor's readings. Returns the filled numeric block with the group's index.
+        """
+        values = group[columns]
+        order = np.arange(len(group))
+        if 'timestamp' in group.columns:
+            times = pd.to_datetime(group['timestamp']).to_numpy()
+            order = np.argsort(times, kind='stable')
+            values = values.iloc[order].set_axis(pd.DatetimeIndex(times[order]))
+
+        filled = getattr(self, f"_{self.strategy}")(values)
+        filled.index = group.index[order]
+        return filled
+
+    def transform(self, df, columns=None):
+        """
+        Returns a copy of df with missing values in `columns` (default: numeric columns) filled.
+        """
+        columns = list(columns if columns is not None else df.select_dtypes(include=[np.number]).columns)
+        if 'sensor_id' in df.columns:
+            groups = [group for _, group in df.groupby('sensor_id', observed=True, sort=False, dropna=False)]
+        else:
+            groups = [df]
+
+        if len(groups) > 1 and self.n_jobs != 1:
+            blocks = Parallel(n_jobs=self.n_jobs)(delayed(self._impute_group)(g, columns) for g in groups)
+        else:
+            blocks = [self._impute_group(g, columns) for g in groups]
+
+        df_imputed = df.copy()
+        df_imputed[columns] = pd.concat(blocks).reindex(df.index)
+        return df_imputed
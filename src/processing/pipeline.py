@@ -1,8 +1,10 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from statsmodels.tsa.stattools import adfuller
 from sklearn.preprocessing import MinMaxScaler
 import joblib
+from joblib import Parallel, delayed, effective_n_jobs
 import sys
 import os
 
@@ -31,14 +33,17 @@ class DatePipeline:
             print("=> Non-Stationary (Fail to Reject H0)")
             return False
 
-    def engineer_features(self, df):
+    @staticmethod
+    def _engineer_block(df, lags, windows):
         """
-        Adds rolling stats, lags, and date parts.
+        Features for a block of sensors, rows sorted by (sensor_id, time).
+        Shifts and windows run over the whole block in one pass; values whose
+        lag or window reaches into the previous sensor are masked to NaN.
         """
-        df = df.copy()
-        df['datetime'] = pd.to_datetime(df['timestamp'])
-        df.set_index('datetime', inplace=True)
-        df.sort_index(inplace=True)
+        if 'sensor_id' in df.columns:
+            position = df.groupby('sensor_id', observed=True, sort=False).cumcount().to_numpy()
+        else:
+            position = np.arange(len(df))
 
         # 1. Date parts
         df['hour'] = df.index.hour
@@ -46,13 +51,51 @@ class DatePipeline:
         df['month'] = df.index.month
 
         # 2. Lag Features (Previous hours)
-        for col in ['pm25', 'pm10', 'no2', 'o3']:
-            df[f'{col}_lag1'] = df[col].shift(1)
-            df[f'{col}_lag24'] = df[col].shift(24) # Daily Seasonality
+        for col in Config.POLLUTANTS:
+            for lag in lags:
+                df[f'{col}_lag{lag}'] = df[col].shift(lag).mask(position < lag)
 
         # 3. Rolling Statistics
-        df['pm25_roll_mean_24h'] = df['pm25'].rolling(window=24).mean()
-        df['pm25_roll_std_24h'] = df['pm25'].rolling(window=24).std()
+        for col in Config.ROLLING_COLUMNS:
+            for window in windows:
+                rolling = df[col].rolling(window=window)
+                incomplete = position < window - 1
+                df[f'{col}_roll_mean_{window}h'] = rolling.mean().mask(incomplete)
+                df[f'{col}_roll_std_{window}h'] = rolling.std().mask(incomplete)
+        return df
+
+    def engineer_features(self, df, lags=None, windows=None, n_jobs=None):
+        """
+        Adds rolling stats, lags, and date parts.
+        Computed per sensor_id, so lags and windows never cross sensors;
+        sensors are split into blocks handled by worker processes when n_jobs != 1.
+        Output is grouped by sensor, in time order within each sensor.
+        """
+        lags = lags or Config.FEATURE_LAGS
+        windows = windows or Config.ROLLING_WINDOWS
+        n_jobs = Config.FEATURE_N_JOBS if n_jobs is None else n_jobs
+
+        df = df.copy()
+        df['datetime'] = pd.to_datetime(df['timestamp'])
+        df.set_index('datetime', inplace=True)
+        df.sort_index(kind='stable', inplace=True)
+
+        if 'sensor_id' not in df.columns:
+            blocks = [df]
+        else:
+            codes, _ = pd.factorize(df['sensor_id'], sort=True)
+            order = np.argsort(codes, kind='stable')
+            df, codes = df.iloc[order], codes[order]
+            # Contiguous runs of whole sensors, one per worker
+            n_blocks = min(effective_n_jobs(n_jobs), codes.max() + 1 if len(codes) else 1)
+            cuts = np.searchsorted(codes, np.linspace(0, codes.max() + 1, n_blocks + 1)[1:-1])
+            blocks = [df.iloc[lo:hi] for lo, hi in zip(np.r_[0, cuts], np.r_[cuts, len(df)])]
+
+        if len(blocks) > 1:
+            parts = Parallel(n_jobs=len(blocks))(delayed(self._engineer_block)(b, lags, windows) for b in blocks)
+            df = pd.concat(parts)
+        else:
+            df = self._engineer_block(blocks[0].copy(), lags, windows)
 
         df.dropna(inplace=True)
         return df
@@ -74,15 +117,33 @@ class DatePipeline:
         df_scaled = pd.DataFrame(scaled_data, columns=feature_cols, index=df.index)
         return df_scaled
 
-    def create_sequences(self, data, seq_len):
+    def create_sequences(self, data, seq_len, target='pm25', horizon=1, copy=False):
         """
         Creates sequences for LSTM: (Samples, TimeSteps, Features)
+        X is a read-only sliding-window view over `data` (no per-window copies);
+        pass copy=True to materialize it. y holds the next `horizon` values of
+        the `target` column (name or position), 1-D when horizon == 1.
         """
-        xs, ys = [], []
-        data_values = data.values
-        for i in range(len(data_values) - seq_len):
-            x = data_values[i:(i + seq_len)]
-            y = data_values[i + seq_len][0] # Predicting PM2.5 (1st column usually)
-            xs.append(x)
-            ys.append(y)
-        return np.array(xs), np.array(ys)
+        if isinstance(target, str):
+            if not isinstance(data, pd.DataFrame):
+                raise ValueError(f"Target '{target}' given by name requires a DataFrame")
+            target_idx = data.columns.get_loc(target)
+        else:
+            target_idx = target
+        data_values = np.asarray(data.values if isinstance(data, pd.DataFrame) else data)
+
+        n_samples = len(data_values) - seq_len - horizon + 1
+        if n_samples <= 0:
+            X = np.empty((0, seq_len, data_values.shape[1]), dtype=data_values.dtype)
+            y = np.empty((0,) if horizon == 1 else (0, horizon), dtype=data_values.dtype)
+            return X, y
+
+        # (Samples, Features, TimeSteps) view -> (Samples, TimeSteps, Features)
+        X = sliding_window_view(data_values, seq_len, axis=0)[:n_samples].transpose(0, 2, 1)
+        y = sliding_window_view(data_values[seq_len:, target_idx], horizon)[:n_samples]
+        if horizon == 1:
+            y = y[:, 0]
+
+        if copy:
+            X, y = np.ascontiguousarray(X), np.ascontiguousarray(y)
+        return X, y
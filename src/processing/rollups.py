@@ -0,0 +1,206 @@
+import pandas as pd
+import numpy as np
+import shutil
+import uuid
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+class RollupStore:
+    """
+    Pre-aggregated statistics of the Data Warehouse for the dashboard:
+        rollups/<grain>/<period>.parquet  (grain: hour, day or week)
+    One row per (sensor_id, bucket) with min/max/sum/count of every pollutant.
+    These aggregates merge exactly, so incremental ETL runs fold their new rows
+    into the touched files only, and a range query reads O(buckets) rows
+    instead of every reading in the range.
+    Hourly files hold a month, daily files a year, weekly rollups one file.
+    """
+    GRAINS = ["hour", "day", "week"] # Finest first
+    PERIOD_LENGTH = {"hour": 7, "day": 4, "week": 0} # ISO prefix used as file name
+    BUCKET_HOURS = {"hour": 1, "day": 24, "week": 24 * 7}
+    STATS = ["min", "max", "sum", "count"]
+    VERSION_FILE = "_version"
+
+    def __init__(self, root=None, columns=None):
+        self.root = root or Config.ROLLUP_DIR
+        self.columns = list(columns or Config.POLLUTANTS)
+        # How each stat merges across rows of the same bucket
+        self.merge_ops = {f"{col}_{stat}": ("sum" if stat == "count" else stat)
+                          for col in self.columns for stat in self.STATS}
+
+    @staticmethod
+    def _bucket(timestamps, grain):
+        ts = pd.to_datetime(timestamps)
+        if grain == "hour":
+            return ts.dt.floor('h')
+        day = ts.dt.floor('D')
+        if grain == "day":
+            return day
+        return day - pd.to_timedelta(day.dt.dayofweek, unit='D') # Weeks start on Monday
+
+    def _period_keys(self, buckets, grain):
+        # Integer key per output file (month, year or a single file)
+        if grain == "hour":
+            return (buckets.dt.year * 100 + buckets.dt.month).to_numpy()
+        if grain == "day":
+            return buckets.dt.year.to_numpy()
+        return np.zeros(len(buckets), dtype=int)
+
+    def _period_name(self, bucket, grain):
+        length = self.PERIOD_LENGTH[grain]
+        return pd.Timestamp(bucket).isoformat()[:length] if length else "all"
+
+    def _aggregate(self, df, grain):
+        """
+        Rollup rows of raw readings (columns: sensor_id, timestamp, pollutants).
+        """
+        keys = [df['sensor_id'].astype(str).rename('sensor_id'), self._bucket(df['timestamp'], grain).rename('bucket')]
+        stats = df[self.columns].groupby(keys, sort=True).agg(self.STATS)
+        stats.columns = [f"{col}_{stat}" for col, stat in stats.columns]
+        return stats.reset_index()
+
+    def _merge(self, df):
+        return df.groupby(['sensor_id', 'bucket'], sort=True).agg(self.merge_ops).reset_index()
+
+    def _path(self, grain, period, root=None):
+        return os.path.join(root or self.root, grain, f"{period}.parquet")
+
+    def _write(self, df, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp-{uuid.uuid4().hex[:8]}")
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def _write_grain(self, rollup, grain, root=None, merge=False):
+        groups = rollup.groupby(self._period_keys(rollup['bucket'], grain), sort=True).indices
+        for positions in groups.values():
+            part = rollup.iloc[positions]
+            path = self._path(grain, self._period_name(part['bucket'].iloc[0], grain), root)
+            if merge and os.path.exists(path):
+                part = self._merge(pd.concat([pd.read_parquet(path), part], ignore_index=True))
+            self._write(part, path)
+        return len(groups)
+
+    def _bump_version(self, root=None):
+        with open(os.path.join(root or self.root, self.VERSION_FILE), 'w') as f:
+            f.write(uuid.uuid4().hex)
+
+    def exists(self):
+        return os.path.isfile(os.path.join(self.root, self.VERSION_FILE))
+
+    def version(self):
+        """
+        Token that changes on every rebuild/update (None before the first one).
+        """
+        try:
+            with open(os.path.join(self.root, self.VERSION_FILE), 'r') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def rebuild(self, df):
+        """
+        Recomputes every grain from the full set of readings (full ETL run).
+        """
+        parent = os.path.dirname(self.root)
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = os.path.join(parent, f".{os.path.basename(self.root)}.tmp-{uuid.uuid4().hex[:8]}")
+        for grain in self.GRAINS:
+            self._write_grain(self._aggregate(df, grain), grain, root=tmp_dir)
+        self._bump_version(tmp_dir)
+
+        old_dir = None
+        if os.path.exists(self.root):
+            old_dir = f"{tmp_dir}.old"
+            os.replace(self.root, old_dir)
+        os.replace(tmp_dir, self.root)
+        if old_dir:
+            shutil.rmtree(old_dir)
+        print(f"Rebuilt rollups ({', '.join(self.GRAINS)}) from {len(df)} records: {self.root}")
+        return self.root
+
+    def update(self, df):
+        """
+        Folds newly processed readings into the existing rollups; only the
+        files of the periods they touch are rewritten.
+        The readings must not already be included (the ETL appends past the watermarks).
+        """
+        if df is None or df.empty:
+            return 0
+        touched = 0
+        for grain in self.GRAINS:
+            touched += self._write_grain(self._aggregate(df, grain), grain, merge=True)
+        self._bump_version()
+        print(f"Updated rollups with {len(df)} records ({touched} files)")
+        return touched
+
+    def grain_for(self, start, end, max_buckets=None):
+        """
+        Finest grain covering [start, end] with at most max_buckets buckets.
+        """
+        max_buckets = max_buckets or Config.ROLLUP_MAX_BUCKETS
+        hours = (pd.Timestamp(end) - pd.Timestamp(start)) / pd.Timedelta(hours=1) + 1
+        for grain in self.GRAINS:
+            if hours / self.BUCKET_HOURS[grain] <= max_buckets:
+                return grain
+        return self.GRAINS[-1]
+
+    def read(self, grain, start=None, end=None, sensors=None):
+        """
+        Raw rollup rows of one grain whose bucket overlaps [start, end].
+        """
+        if grain not in self.GRAINS:
+            raise ValueError(f"Unknown rollup grain '{grain}' (expected one of {self.GRAINS})")
+        directory = os.path.join(self.root, grain)
+        if not os.path.isdir(directory):
+            return None
+        first = self._bucket(pd.Series([pd.Timestamp(start)]), grain)[0] if start is not None else None
+        length = self.PERIOD_LENGTH[grain]
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.parquet') and not name.startswith('.'))
+        if length:
+            # Skip whole files outside the range by their period name
+            lo = first.isoformat()[:length] if first is not None else None
+            hi = pd.Timestamp(end).isoformat()[:length] if end is not None else None
+            names = [n for n in names if (lo is None or n[:length] >= lo) and (hi is None or n[:length] <= hi)]
+
+        filters = []
+        if first is not None:
+            filters.append(('bucket', '>=', first))
+        if end is not None:
+            filters.append(('bucket', '<=', pd.Timestamp(end)))
+        if sensors is not None:
+            filters.append(('sensor_id', 'in', [str(s) for s in sensors]))
+        parts = [pd.read_parquet(os.path.join(directory, name), filters=filters or None) for name in names]
+        if not parts:
+            return pd.DataFrame(columns=['sensor_id', 'bucket'] + list(self.merge_ops))
+        return pd.concat(parts, ignore_index=True)
+
+    def query(self, start, end, sensor_id=None, grain=None):
+        """
+        Statistics per bucket over [start, end], for one sensor or all of them:
+        DataFrame indexed by bucket with <pollutant>_{min,max,sum,count,mean}.
+        Returns None when the rollups have not been built yet.
+        """
+        grain = grain or self.grain_for(start, end)
+        df = self.read(grain, start, end, sensors=[sensor_id] if sensor_id is not None else None)
+        if df is None:
+            return None
+        df = df.groupby('bucket', sort=True).agg(self.merge_ops)
+        for col in self.columns:
+            count = df[f"{col}_count"]
+            df[f"{col}_mean"] = (df[f"{col}_sum"] / count).where(count > 0)
+        df.index = pd.DatetimeIndex(df.index, name='bucket')
+        df.attrs['grain'] = grain
+        return df
+
+if __name__ == "__main__":
+    # Backfill: build the rollups from the current warehouse
+    from processing.warehouse import Warehouse
+    df = Warehouse().read(columns=['sensor_id', 'timestamp'] + Config.POLLUTANTS)
+    if df is None:
+        print("Data Warehouse not found. Run the ETL first.")
+    else:
+        RollupStore().rebuild(df)
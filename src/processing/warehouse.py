@@ -0,0 +1,297 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from datetime import datetime, timezone
+import uuid
+import shutil
+import json
+import os
+import sys
+
+# Config path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+class Warehouse:
+    """
+    Data Warehouse stored as a hive-partitioned Parquet dataset:
+        processed_features.parquet/sensor_id=<id>/date=<YYYY-MM or YYYY-MM-DD>/part-*.parquet
+    (granularity from Config.WAREHOUSE_PARTITION).
+    Full rebuilds replace the directory, incremental runs append new parts.
+    Reads only open the partition directories matching the sensor/time filters,
+    then push the timestamp filter and column projection down to the files.
+    Per-sensor high-water marks (latest processed timestamp) live next to the data.
+    Compaction merges a partition's parts into one part named after its last
+    input (suffix COMPACT_SUFFIX); it supersedes every part sorting before it,
+    so one rename swaps it in and the inputs are deleted afterwards.
+    """
+    WATERMARK_FILE = "_watermarks.json" # '_' prefix: ignored by Parquet readers
+    VERSION_FILE = "_version"
+    COMPACT_SUFFIX = "~compact.parquet" # '~' sorts after the inputs' names, before later parts
+    # Length of the ISO timestamp prefix used as the `date` partition value
+    KEY_LENGTH = {"month": 7, "day": 10}
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(Config.DATA_WAREHOUSE_DIR, f"{Config.COLLECTION_PROCESSED}.parquet")
+        self.base_dir = os.path.dirname(self.path)
+        self.key_length = self.KEY_LENGTH[Config.WAREHOUSE_PARTITION]
+
+    @staticmethod
+    def _part_name():
+        # Sortable by creation time, so readers see parts in ingestion order
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        return f"part-{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+
+    @staticmethod
+    def _is_part(name):
+        return name.endswith('.parquet') and not name.startswith(('.', '_'))
+
+    def _live_parts(self, names):
+        """
+        Part names of one partition that hold its data: the latest compacted
+        part and the parts appended after it (the ones before are its inputs).
+        """
+        parts = sorted(name for name in names if self._is_part(name))
+        compacted = [i for i, name in enumerate(parts) if name.endswith(self.COMPACT_SUFFIX)]
+        return parts[compacted[-1]:] if compacted else parts
+
+    def _date_key(self, ts):
+        return pd.Timestamp(ts).isoformat()[:self.key_length]
+
+    def _write_part(self, df, directory, name=None):
+        # Write under a hidden name, then rename so readers never see partial files
+        os.makedirs(directory, exist_ok=True)
+        name = name or self._part_name()
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(directory, name))
+        return os.path.join(directory, name)
+
+    def _write_partitions(self, df, root):
+        """
+        Writes one part per (sensor_id, date) partition under root.
+        """
+        dates = df['timestamp'].astype(str).str[:self.key_length]
+        data = df.drop(columns=['sensor_id'])
+        paths = []
+        for (sensor_id, date), positions in df.groupby([df['sensor_id'].astype(str), dates], sort=True).indices.items():
+            directory = os.path.join(root, f"sensor_id={sensor_id}", f"date={date}")
+            paths.append(self._write_part(data.iloc[positions], directory))
+        return paths
+
+    def _bump_version(self, root=None):
+        with open(os.path.join(root or self.path, self.VERSION_FILE), 'w') as f:
+            f.write(uuid.uuid4().hex)
+
+    def _has_legacy_layout(self):
+        """
+        Monolithic file, or flat part files from before partitioning.
+        """
+        if os.path.isfile(self.path):
+            return True
+        return os.path.isdir(self.path) and any(self._is_part(name) for name in os.listdir(self.path))
+
+    def _migrate_legacy(self):
+        print(f"Migrating Data Warehouse to partitioned layout: {self.path}")
+        watermarks = self.load_watermarks()
+        df = pd.read_parquet(self.path)
+        self.write(df)
+        if watermarks:
+            self.save_watermarks(watermarks)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def version(self):
+        """
+        Token that changes on every write/append (None before the first run).
+        """
+        try:
+            with open(os.path.join(self.path, self.VERSION_FILE), 'r') as f:
+                return f.read()
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        if os.path.isfile(self.path):
+            st = os.stat(self.path)
+            return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+        return None
+
+    def write(self, df):
+        """
+        Full rebuild: replaces the whole dataset (and its watermarks).
+        """
+        os.makedirs(self.base_dir, exist_ok=True)
+        tmp_dir = os.path.join(self.base_dir, f".{os.path.basename(self.path)}.tmp-{uuid.uuid4().hex[:8]}")
+        os.makedirs(tmp_dir)
+        self._write_partitions(df, tmp_dir)
+        self._bump_version(tmp_dir)
+
+        old_dir = None
+        if os.path.exists(self.path):
+            old_dir = f"{tmp_dir}.old"
+            os.replace(self.path, old_dir)
+        os.replace(tmp_dir, self.path)
+        if old_dir:
+            if os.path.isdir(old_dir):
+                shutil.rmtree(old_dir)
+            else:
+                os.remove(old_dir)
+
+        print(f"Saved processed data to Data Warehouse: {self.path}")
+        return self.path
+
+    def append(self, df):
+        """
+        Incremental load: adds one part per touched partition.
+        """
+        if self._has_legacy_layout():
+            self._migrate_legacy()
+        os.makedirs(self.path, exist_ok=True)
+        paths = self._write_partitions(df, self.path)
+        self._bump_version()
+        print(f"Appended {len(df)} records to Data Warehouse: {self.path} ({len(paths)} partitions)")
+        return paths
+
+    def _partition_files(self, start=None, end=None, sensors=None):
+        """
+        Part files of the partitions overlapping the filters, found by path
+        (no listing of unrelated partitions).
+        """
+        start_key = self._date_key(start) if start is not None else None
+        end_key = self._date_key(end) if end is not None else None
+        if sensors is None:
+            sensor_dirs = [name for name in os.listdir(self.path) if name.startswith('sensor_id=')]
+        else:
+            sensor_dirs = [f"sensor_id={sensor_id}" for sensor_id in sensors]
+
+        files = []
+        for sensor_dir in sorted(sensor_dirs):
+            sensor_path = os.path.join(self.path, sensor_dir)
+            if not os.path.isdir(sensor_path):
+                continue
+            for date_dir in sorted(os.listdir(sensor_path)):
+                key = date_dir.split('=', 1)[-1]
+                if (start_key and key < start_key) or (end_key and key > end_key):
+                    continue
+                date_path = os.path.join(sensor_path, date_dir)
+                files.extend(os.path.join(date_path, name) for name in self._live_parts(os.listdir(date_path)))
+        return files
+
+    def read(self, columns=None, start=None, end=None, sensors=None):
+        """
+        Reads the warehouse, optionally restricted to start <= timestamp <= end,
+        to the given sensor ids and to a subset of columns.
+        Rows come back grouped by sensor, in time order within each sensor.
+        """
+        if not self.exists():
+            return None
+        if self._has_legacy_layout():
+            df = pd.read_parquet(self.path)
+            if start is not None:
+                df = df[df['timestamp'] >= pd.Timestamp(start).isoformat()]
+            if end is not None:
+                df = df[df['timestamp'] <= pd.Timestamp(end).isoformat()]
+            if sensors is not None:
+                df = df[df['sensor_id'].isin(sensors)]
+            return (df[columns] if columns else df).reset_index(drop=True)
+
+        try:
+            return self._read_partitions(columns, start, end, sensors)
+        except FileNotFoundError:
+            # A compaction deleted its inputs after we listed them: list again
+            return self._read_partitions(columns, start, end, sensors)
+
+    def _read_partitions(self, columns, start, end, sensors):
+        files = self._partition_files(start, end, sensors)
+        if not files:
+            return pd.DataFrame(columns=columns or [])
+
+        partitioning = ds.partitioning(pa.schema([('sensor_id', pa.string()), ('date', pa.string())]), flavor='hive')
+        dataset = ds.dataset(files, format='parquet', partitioning=partitioning, partition_base_dir=self.path)
+
+        expr = None
+        if start is not None:
+            expr = ds.field('timestamp') >= pd.Timestamp(start).isoformat()
+        if end is not None:
+            condition = ds.field('timestamp') <= pd.Timestamp(end).isoformat()
+            expr = condition if expr is None else expr & condition
+
+        if columns is None:
+            columns = [name for name in dataset.schema.names if name != 'date']
+        keys = [col for col in ('sensor_id', 'timestamp') if col not in columns]
+        df = dataset.to_table(columns=list(columns) + keys, filter=expr).to_pandas()
+        df['sensor_id'] = df['sensor_id'].astype(str)
+        # Files come sensor by sensor, but late readings sit in newer parts of a
+        # partition until compact(): restore time order within each sensor
+        sensors, stamps = df['sensor_id'].to_numpy(), df['timestamp'].to_numpy()
+        if ((sensors[1:] == sensors[:-1]) & (stamps[1:] < stamps[:-1])).any():
+            df = df.sort_values(['sensor_id', 'timestamp'], kind='stable', ignore_index=True)
+        return df.drop(columns=keys) if keys else df
+
+    def compact(self, min_files=None):
+        """
+        Merges partitions holding at least min_files small parts into a single part.
+        Each merged part replaces its inputs for readers in one rename; the
+        version is bumped before the inputs are deleted. Inputs left behind by
+        an interrupted run are never read and are deleted by the next one.
+        """
+        min_files = min_files or Config.WAREHOUSE_COMPACT_MIN_FILES
+        if not os.path.isdir(self.path) or self._has_legacy_layout():
+            return 0
+        compacted, superseded = 0, []
+        for dirpath, _, filenames in os.walk(self.path):
+            parts = self._live_parts(filenames)
+            superseded.extend(os.path.join(dirpath, name) for name in filenames
+                              if self._is_part(name) and name not in parts)
+            if len(parts) < min_files:
+                continue
+            paths = [os.path.join(dirpath, name) for name in parts]
+            df = pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True)
+            self._write_part(df.sort_values('timestamp', kind='stable'), dirpath,
+                             name=parts[-1][:-len('.parquet')] + self.COMPACT_SUFFIX)
+            superseded.extend(paths)
+            compacted += 1
+        if compacted:
+            self._bump_version()
+        for path in superseded:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        if compacted:
+            print(f"Compacted {compacted} warehouse partitions")
+        return compacted
+
+    # --- Watermarks ---
+
+    def _watermark_path(self):
+        return os.path.join(self.path, self.WATERMARK_FILE)
+
+    def load_watermarks(self):
+        """
+        {sensor_id: latest processed timestamp (ISO string)}; empty before the first run.
+        """
+        path = self._watermark_path()
+        if not os.path.isfile(path):
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def save_watermarks(self, watermarks):
+        path = self._watermark_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(watermarks, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def update_watermarks(self, df):
+        """
+        Advances the per-sensor watermarks to the latest timestamps in df.
+        """
+        watermarks = self.load_watermarks()
+        latest = df.groupby('sensor_id', observed=True)['timestamp'].max()
+        for sensor_id, ts in latest.items():
+            if ts > watermarks.get(sensor_id, ''):
+                watermarks[sensor_id] = ts
+        self.save_watermarks(watermarks)
+        return watermarks
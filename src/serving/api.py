@@ -1,49 +1,100 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, request, jsonify, render_template, send_from_directory, stream_with_context
 import pandas as pd
 import numpy as np
-import joblib
-import tensorflow as tf
-from tensorflow.keras.models import load_model, save_model
 import os
 import sys
 import json
+import threading
+import time
+import warnings
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
 
+# Risk scoring passes NumPy matrices already in training column order
+warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+
 app = Flask(__name__, 
             template_folder=os.path.join(Config.BASE_DIR, 'templates'),
             static_folder=os.path.join(Config.BASE_DIR, 'static'))
 
-# Global variables for models
-scaler = None
-lstm_model = None
-rf_model = None
+from serving.models import ModelStore
+from modeling.registry import ModelRegistry
+
+# Models load on first use (TensorFlow only when a forecast is requested).
+# Handlers hold one reference to `models` per request (ModelStore.in_use), so
+# a hot swap never mixes two bundles within a request nor closes one under it.
+registry = ModelRegistry()
+models = ModelStore.from_registry(registry)
 
 def load_models():
-    global scaler, lstm_model, rf_model
-    try:
-        scaler = joblib.load(os.path.join(Config.MODEL_DIR, "scaler.pkl"))
-        rf_model = joblib.load(os.path.join(Config.MODEL_DIR, "rf_classifier.pkl"))
-        
-        # Load LSTM (Keras format)
-        lstm_path = os.path.join(Config.MODEL_DIR, "lstm_best.keras")
-        if not os.path.exists(lstm_path):
-             lstm_path = os.path.join(Config.MODEL_DIR, "lstm_model.keras") # Fallback
-             if not os.path.exists(lstm_path):
-                  lstm_path = os.path.join(Config.MODEL_DIR, "lstm_model.h5") # Legacy
-        
-        if os.path.exists(lstm_path):
-            lstm_model = load_model(lstm_path)
-            print(f"Models loaded successfully from {lstm_path}")
-        else:
-            print("Warning: LSTM model not found.")
-            
-    except Exception as e:
-        print(f"Error loading models: {e}")
+    """
+    Eagerly loads and warms up every model (development server).
+    """
+    models.warm_up()
+
+def reload_models():
+    """
+    Swaps in the registry's current bundle if it changed.
+    The new bundle is loaded before the swap and dropped if any model fails.
+    Returns the replaced store (None when nothing changed).
+    """
+    global models
+    version = registry.current()
+    if version is None or version == models.version:
+        return None
+    current = models
+    candidate = ModelStore(registry.path(version), version=version)
+    # Keep the LSTM warm if this worker already served forecasts
+    candidate.preload(lstm=current.loaded().get('lstm_model', False))
+    failed = [name for name, ok in candidate.loaded().items() if not ok]
+    if failed:
+        print(f"Model bundle {version} not loaded ({', '.join(failed)} failed); still serving {current.version}")
+        return None
+    models = candidate
+    print(f"Serving model bundle {version} (was {current.version})")
+    return current
+
+def start_model_watcher(interval=None):
+    """
+    Polls the registry in a background thread and hot-swaps promoted bundles.
+    A replaced store's forecast worker stops once the last in-flight
+    request holding it has finished.
+    """
+    interval = interval or Config.MODEL_RELOAD_INTERVAL
+
+    def watch():
+        while True:
+            time.sleep(interval)
+            try:
+                retired = reload_models()
+                if retired is not None:
+                    retired.close()
+            except Exception as e:
+                print(f"Model reload failed: {e}")
+
+    watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+    watcher.start()
+    return watcher
 
 from serving.narrative import NarrativeService
+from serving.warehouse import WarehouseCache, RollupCache
+from serving.features import OnlineFeatureStore
+from serving.downsample import downsample, METHODS as DOWNSAMPLE_METHODS
+from serving.encoding import FORMATS, ENCODERS, negotiate_format, etag, compress, json_safe
+from serving.live import LivePublisher
+from processing.rollups import RollupStore
+from modeling.risk import label_risk
+
+# Shared warehouse reader (only the columns the dashboard endpoints need)
+warehouse = WarehouseCache(columns=['timestamp', 'pm25', 'pm10', 'no2', 'o3'])
+# Pre-aggregated hour/day/week statistics, maintained by the ETL
+rollups = RollupCache()
+# Live readings/risk/forecast events, computed once per process for all /api/stream clients
+live = LivePublisher(warehouse, models=lambda: models)
+
+HISTORY_HOURS = {'24h': 24, '7d': 24 * 7, '30d': 24 * 30, '1y': 24 * 365, '5y': 24 * 365 * 5}
 
 @app.route('/')
 def dashboard():
@@ -65,130 +116,455 @@ def forecasting():
 def settings():
     return render_template('pages/settings.html', page_id='settings')
 
+def _latest_timestamp(sensor_id=None):
+    """
+    Latest processed reading (from the watermarks, no scan).
+    """
+    watermarks = warehouse.warehouse.load_watermarks()
+    if sensor_id is not None:
+        watermarks = {s: ts for s, ts in watermarks.items() if s == sensor_id}
+    return pd.Timestamp(max(watermarks.values())) if watermarks else None
+
+def _json_values(values):
+    # NaN is not valid JSON (e.g. a bucket without readings of one pollutant)
+    if np.issubdtype(np.asarray(values).dtype, np.datetime64):
+        return pd.DatetimeIndex(values).astype(str).tolist()
+    values = pd.Series(values)
+    return values.astype(object).where(values.notna(), None).tolist()
+
+def _respond(fmt, meta, tables, json_keys, tag):
+    """
+    Data response in the negotiated format.
+        meta: JSON-able fields; tables: [(name, {column: array})]
+        json_keys: {(table, column): key} for the (unchanged) JSON layout
+    Binary formats skip the per-value Python objects of JSON entirely.
+    NaN in meta (stats, KPIs) is sent as null, like NaN in the series.
+    """
+    meta = json_safe(meta)
+    if fmt == 'json':
+        payload = dict(meta)
+        for table, data in tables:
+            for column, values in data.items():
+                payload[json_keys[(table, column)]] = _json_values(values)
+        response = jsonify(payload)
+    else:
+        response = Response(ENCODERS[fmt](tables, meta), mimetype=FORMATS[fmt])
+    return _tagged(response, tag)
+
+def _tagged(response, tag):
+    # Clients revalidate every time and get 304 until the data changes
+    response.set_etag(tag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept')
+    return response
+
+def _not_modified(tag):
+    return _tagged(Response(status=304), tag)
+
+@app.after_request
+def compress_response(response):
+    """
+    gzip/brotli for the data formats (streamed NDJSON and files are left alone).
+    """
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.mimetype not in FORMATS.values()):
+        return response
+    response.vary.add('Accept-Encoding')
+    body, encoding = compress(response.get_data(), request.headers.get('Accept-Encoding', ''))
+    if encoding is not None:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+HISTORY_JSON_KEYS = {('history', 'date'): 'dates', ('history', 'pm25'): 'pm25',
+                     ('history', 'pm10'): 'pm10', ('history', 'no2'): 'no2'}
+
+def _history_data(dates, series, stats, max_points=None, method=None):
+    """
+    (meta, tables) of an /api/history response; with max_points, the series
+    are downsampled to at most that many shared points (stats always cover
+    the full range).
+    """
+    meta = {"stats": stats}
+    if max_points is not None and len(dates) > max_points:
+        method = method or Config.DOWNSAMPLE_METHOD
+        keep = downsample(dates, [values.to_numpy(dtype=float) for values in series.values()], max_points, method)
+        meta["downsample"] = {"method": method, "source_points": len(dates)}
+        dates = dates[keep]
+        series = {name: values.iloc[keep] for name, values in series.items()}
+    columns = {"date": np.asarray(dates, dtype='datetime64[ns]')}
+    columns.update({name: values.to_numpy(dtype=float) for name, values in series.items()})
+    return meta, [("history", columns)]
+
+def _stat(value):
+    # Rounded aggregate; None without readings (NaN is not valid JSON)
+    return None if pd.isna(value) else round(float(value), 1)
+
+def _rollup_history(start, end, sensor_id, grain, max_points=None, method=None):
+    """
+    /api/history (meta, tables) from the rollups; None if they are not built yet.
+    """
+    history = rollups.query(start, end, sensor_id, grain)
+    if history is None:
+        return None
+    count = history['pm25_count'].sum()
+    stats = {
+        "avg_pm25": _stat(history['pm25_sum'].sum() / count) if count else None,
+        "max_no2": _stat(history['no2_max'].max()),
+        "count": int(count)
+    }
+    series = {col: history[f'{col}_mean'] for col in ['pm25', 'pm10', 'no2']}
+    meta, tables = _history_data(history.index, series, stats, max_points, method)
+    meta["grain"] = history.attrs['grain']
+    return meta, tables
+
 @app.route('/api/history', methods=['GET'])
 def get_history():
     """
     Returns historical data for analytics.
     Params: 
-        period: '24h', '7d', '30d' (default 24h)
+        period: '24h', '7d', '30d', '1y', '5y' (default 24h)
+        sensor_id: optional, restricts the series to one sensor
+        start, end: optional ISO timestamps for an arbitrary range (overrides period)
+        grain: optional rollup bucket ('hour', 'day', 'week'); chosen from the range by default
+        max_points: optional cap on the points per series (server-side downsampling)
+        downsample: 'minmax' (keeps peaks) or 'lttb' (default Config.DOWNSAMPLE_METHOD)
+        format: 'json', 'arrow' or 'f32' (or the matching Accept header)
+    The 24h view returns hourly readings (the fleet mean per hour without
+    sensor_id, like the rollup buckets); longer ranges are served from the
+    rollups (one mean per bucket), so a year costs as much as a week.
+    Responses carry an ETag tied to the warehouse/rollup versions (304 when unchanged).
     """
     try:
         period = request.args.get('period', '24h')
-        limit = 24
-        if period == '7d': limit = 168
-        elif period == '30d': limit = 720
+        sensor_id = request.args.get('sensor_id')
+        start, end = request.args.get('start'), request.args.get('end')
+        grain = request.args.get('grain')
+        method = request.args.get('downsample')
+        if period not in HISTORY_HOURS:
+            return jsonify({"error": f"Unknown period '{period}' (expected one of {list(HISTORY_HOURS)})"}), 400
+        if grain is not None and grain not in RollupStore.GRAINS:
+            return jsonify({"error": f"Unknown grain '{grain}' (expected one of {RollupStore.GRAINS})"}), 400
+        if method is not None and method not in DOWNSAMPLE_METHODS:
+            return jsonify({"error": f"Unknown downsample method '{method}' (expected one of {list(DOWNSAMPLE_METHODS)})"}), 400
+        max_points = request.args.get('max_points', type=int)
+        if 'max_points' in request.args and (max_points is None or max_points < Config.DOWNSAMPLE_MIN_POINTS):
+            return jsonify({"error": f"max_points must be an integer >= {Config.DOWNSAMPLE_MIN_POINTS}"}), 400
+        try:
+            fmt = negotiate_format(request)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        limit = HISTORY_HOURS[period]
+
+        tag = etag(warehouse.version, rollups.store.version(), request.full_path, fmt)
+        if request.if_none_match.contains_weak(tag):
+            return _not_modified(tag)
+
+        explicit = start is not None or end is not None or grain is not None
+        if explicit or period != '24h':
+            try:
+                end = pd.Timestamp(end) if end is not None else _latest_timestamp(sensor_id)
+                if end is None:
+                    return jsonify({"error": "Data not found"}), 404
+                start = pd.Timestamp(start) if start is not None else end - pd.Timedelta(hours=limit - 1)
+            except ValueError as e:
+                return jsonify({"error": f"Invalid start/end: {e}"}), 400
+            if start > end:
+                return jsonify({"error": "start must not be after end"}), 400
+            data = _rollup_history(start, end, sensor_id, grain, max_points, method)
+            if data is not None:
+                return _respond(fmt, *data, HISTORY_JSON_KEYS, tag)
+            if explicit:
+                return jsonify({"error": "Rollups not built yet. Run the ETL first."}), 503
+            # Rollups not built yet: fall back to the last raw readings
         
-        # Load Data Warehouse
-        processed_path = os.path.join(Config.DATA_WAREHOUSE_DIR, f"{Config.COLLECTION_PROCESSED}.parquet")
-        if not os.path.exists(processed_path):
+        # Slice last N records from the cached Data Warehouse
+        history = warehouse.tail(limit, sensor_id)
+        if history is None or history.empty:
             return jsonify({"error": "Data not found"}), 404
-            
-        df = pd.read_parquet(processed_path)
-        
-        # Slice last N records
-        history = df.iloc[-limit:]
         
-        return jsonify({
-            "dates": history.index.astype(str).tolist(),
-            "pm25": history['pm25'].tolist(),
-            "pm10": history['pm10'].tolist(),
-            "no2": history['no2'].tolist(),
-            "stats": {
-                "avg_pm25": round(history['pm25'].mean(), 1),
-                "max_no2": round(history['no2'].max(), 1),
-                "count": len(history)
-            }
-        })
+        stats = {
+            "avg_pm25": _stat(history['pm25'].mean()),
+            "max_no2": _stat(history['no2'].max()),
+            "count": len(history)
+        }
+        series = {col: history[col] for col in ['pm25', 'pm10', 'no2']}
+        return _respond(fmt, *_history_data(history.index, series, stats, max_points, method), HISTORY_JSON_KEYS, tag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+STATS_JSON_KEYS = {('history', 'date'): 'history_dates', ('history', 'pm25'): 'history_values',
+                   ('forecast', 'date'): 'forecast_dates', ('forecast', 'pm25'): 'forecast_values'}
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """
     Returns data for the dashboard.
+    Params:
+        sensor_id: optional, restricts the view to one sensor
+        format: 'json', 'arrow' or 'f32' (or the matching Accept header);
+                binary formats hold the history and forecast as two tables
+    Without sensor_id, the history, KPIs and forecast use the fleet mean per hour.
+    Responses carry an ETag tied to the warehouse and model versions.
     """
     try:
-        # Load latest data
-        processed_path = os.path.join(Config.DATA_WAREHOUSE_DIR, f"{Config.COLLECTION_PROCESSED}.parquet")
-        if os.path.exists(processed_path):
-            df = pd.read_parquet(processed_path)
-            latest = df.iloc[-1]
-            
-            # Dummy forecast for demo
-            forecast_values = [max(0, latest['pm25'] * (1 + np.sin(i/5)*0.1)) for i in range(24)]
-            forecast_dates = pd.date_range(start=latest.name, periods=24, freq='h').astype(str).tolist()
+        sensor_id = request.args.get('sensor_id')
+        try:
+            fmt = negotiate_format(request)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        with models.in_use() as store:
+            forecast_batcher = store.forecast_batcher
+            tag = etag(warehouse.version, store.version, forecast_batcher is not None, request.full_path, fmt)
+            if request.if_none_match.contains_weak(tag):
+                return _not_modified(tag)
+
+            # Load latest data
+            history = warehouse.tail(48, sensor_id) # Last 48h
+            if history is not None and not history.empty:
+                latest = history.iloc[-1]
             
-            history = df.iloc[-48:] # Last 48h
+                if forecast_batcher is not None:
+                    forecaster = store.forecaster
+                    window = forecaster.prepare_window(warehouse.tail(forecaster.context_len, sensor_id))
+                    forecast_values = forecast_batcher.submit(window)
+                else:
+                    # Dummy forecast for demo (LSTM not loaded)
+                    forecast_values = np.array([max(0, latest['pm25'] * (1 + np.sin(i/5)*0.1)) for i in range(24)])
+                forecast_dates = pd.date_range(start=latest.name + pd.Timedelta(hours=1), periods=len(forecast_values), freq='h')
             
-            # Data Stories
-            risk_level = "Red Alert" if latest['pm25'] > 300 else ("Safe" if latest['pm25'] < 50 else "Moderate")
-            trend = forecast_values[-1] - forecast_values[0]
-            briefing = NarrativeService.generate_briefing(latest['pm25'], risk_level, trend)
+                # Data Stories
+                risk_level = label_risk([latest['pm25']])[0]
+                trend = forecast_values[-1] - forecast_values[0]
+                briefing = NarrativeService.generate_briefing(latest['pm25'], risk_level, trend)
             
-            return jsonify({
-                "current_risk": risk_level,
-                "latest_pm25": float(latest['pm25']),
-                "forecast_avg": np.mean(forecast_values),
-                "mape": 10.5, 
-                "history_dates": history.index.astype(str).tolist(),
-                "history_values": history['pm25'].tolist(),
-                "forecast_dates": forecast_dates,
-                "forecast_values": forecast_values,
-                "briefing": briefing
-            })
-        else:
-            return jsonify({"error": "Data not found. Run pipeline first."})
+                meta = {
+                    "current_risk": risk_level,
+                    "latest_pm25": float(latest['pm25']),
+                    "forecast_avg": float(np.mean(forecast_values)),
+                    "mape": 10.5, 
+                    "briefing": briefing
+                }
+                tables = [
+                    ("history", {"date": history.index.to_numpy(), "pm25": history['pm25'].to_numpy(dtype=float)}),
+                    ("forecast", {"date": forecast_dates.to_numpy(), "pm25": np.asarray(forecast_values, dtype=float)}),
+                ]
+                return _respond(fmt, meta, tables, STATS_JSON_KEYS, tag)
+            else:
+                return jsonify({"error": "Data not found. Run pipeline first."})
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/stream', methods=['GET'])
+def stream():
+    """
+    Server-sent events replacing /api/stats polling: new readings with their
+    risk level, and forecasts with their change, per sensor and for the fleet
+    (sensor_id null), as they arrive.
+    Params:
+        sensor_id: optional, only that sensor's events
+    Starts with a snapshot (or, with Last-Event-ID, the missed events).
+    Under the ASGI server this path is served on the event loop (serving/asgi.py).
+    """
+    sensor_id = request.args.get('sensor_id')
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    response = Response(live.stream(sensor_id, last_event_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # No proxy buffering (nginx)
+    return response
+
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({"status": "healthy"}), 200
+    return jsonify({"status": "healthy", "model_version": models.version}), 200
+
+def _recent_readings(sensor_id, n_rows):
+    """
+    Last n_rows processed readings of one sensor (pruned warehouse read).
+    """
+    watermark = warehouse.warehouse.load_watermarks().get(sensor_id)
+    if watermark is None:
+        return None
+    start = pd.Timestamp(watermark) - pd.Timedelta(hours=n_rows - 1)
+    return warehouse.warehouse.read(columns=['timestamp'] + Config.POLLUTANTS, start=start, sensors=[sensor_id])
+
+# Incremental lag/rolling features, warmed per sensor from the warehouse
+feature_store = OnlineFeatureStore(history=_recent_readings)
+
+def _risk_feature_names(rf_model):
+    # Feature order must match training
+    return list(getattr(rf_model, 'feature_names_in_', feature_store.feature_names))
+
+def _score_readings(readings, rf_model):
+    """
+    Scores a chunk of raw readings with one model call.
+    Yields one result dict per reading, in input order.
+    """
+    valid = [i for i, reading in enumerate(readings) if isinstance(reading, dict)]
+    X, valid_errors = feature_store.update_many([readings[i] for i in valid], _risk_feature_names(rf_model))
+    errors = ["Invalid reading: expected a JSON object"] * len(readings)
+    for i, error in zip(valid, valid_errors):
+        errors[i] = error
+    for i in np.flatnonzero(np.isnan(X).any(axis=1)):
+        if errors[valid[i]] is None:
+            errors[valid[i]] = "Not enough history to compute lag/rolling features"
+    ok = np.array([errors[i] is None for i in valid], dtype=bool)
+    labels = iter(rf_model.predict(X[ok]) if ok.any() else [])
+
+    results, scored = [], []
+    for reading, error in zip(readings, errors):
+        reading = reading if isinstance(reading, dict) else {}
+        result = {"sensor_id": reading.get('sensor_id'), "timestamp": reading.get('timestamp')}
+        if error is None:
+            result["risk_level"] = str(next(labels))
+            scored.append(dict(reading, predicted_risk=result["risk_level"]))
+        else:
+            result["error"] = error
+        results.append(result)
+    # Latest reading per sensor of the chunk to the live stream
+    live.publish_readings(scored)
+    yield from results
+
+def _parse_ndjson(lines):
+    # Malformed lines become None and are reported per reading
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+def _iter_chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
 @app.route('/predict/risk', methods=['POST'])
 def predict_risk():
     """
-    Predicts risk category based on current PM2.5, PM10, etc.
-    Input: JSON {"pm25": 45, "pm10": 60, "no2": 20, "o3": 30}
+    Predicts risk category from a new raw reading.
+    Input: JSON {"sensor_id": "VN_HANOI_001", "timestamp": "2023-01-01T12:00:00",
+                 "pm25": 45, "pm10": 60, "no2": 20, "o3": 30}
+    Lags and rolling stats come from the online feature store, which also
+    records the reading (timestamps must increase per sensor). timestamp
+    defaults to the current hour.
     """
+    rf_model = models.rf_model
+    if rf_model is None:
+        return jsonify({"error": "Risk model not loaded"}), 503
     try:
         data = request.json
-        # Feature order must match training
-        # Features used in RF were: ['pm25', 'pm10', 'no2', 'o3', 'hour', 'day_of_week', 'month', + lags...]
-        # For simplicity in this demo, we assumes the model was trained on just the raw sensors or we compute features here
-        # To keep it simple for the API demo, let's assume the user sends raw features needed.
-        
-        # Real-world: We would need to fetch history to compute lags. 
-        # Here we mock input for the "raw" features + dummy temporal features if needed.
-        
-        # NOTE: The simplest RF interpretation uses just the current values or specific lags.
-        # Let's assume we pass the dataframe-like dict
-        
-        df = pd.DataFrame([data])
-        # We need to ensure columns match training. 
-        # For this PoC, we will wrap in a try-except if features mismatch.
-        
-        prediction = rf_model.predict(df)
-        return jsonify({"risk_level": prediction[0]})
+        sensor_id = data.get('sensor_id')
+        if not sensor_id:
+            return jsonify({"error": "sensor_id is required"}), 400
+        timestamp = data.get('timestamp') or pd.Timestamp.now().floor('h')
+
+        features = feature_store.update(sensor_id, timestamp, data)
+        names = _risk_feature_names(rf_model)
+        missing = [name for name in names if pd.isna(features.get(name))]
+        if missing:
+            return jsonify({"error": f"Not enough history for {sensor_id} to compute {missing}"}), 422
+
+        prediction = rf_model.predict(np.array([[features[name] for name in names]]))
+        live.publish_readings([dict(data, timestamp=timestamp, predicted_risk=prediction[0])])
+        return jsonify({
+            "risk_level": prediction[0],
+            "sensor_id": sensor_id,
+            "timestamp": str(pd.Timestamp(timestamp)),
+            "features": {name: float(features[name]) for name in names}
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
-@app.route('/predict/forecast', methods=['POST'])
-def predict_forecast():
+@app.route('/predict/risk/batch', methods=['POST'])
+def predict_risk_batch():
     """
-    Forecasts next 24h of PM2.5 using LSTM
-    Input: JSON with last 24h of data.
+    Scores many raw readings (e.g. a gateway's last minute) in chunked model calls.
+    Input: JSON list of readings ({"sensor_id", "timestamp", "pm25", "pm10", "no2", "o3"}),
+           {"readings": [...]}, or NDJSON (one reading per line, Content-Type application/x-ndjson).
+    Readings are fed to the online feature store in order, so per sensor they must be in time order.
+    Output: {"count", "results": [...]}, streamed instead as NDJSON (one result per line)
+            for NDJSON input, batches of Config.RISK_STREAM_MIN_ROWS or more readings,
+            or Accept: application/x-ndjson.
+    Each result carries sensor_id, timestamp and either risk_level or error.
+    """
+    rf_model = models.rf_model
+    if rf_model is None:
+        return jsonify({"error": "Risk model not loaded"}), 503
+
+    ndjson_in = request.mimetype in ('application/x-ndjson', 'application/jsonl')
+    if ndjson_in:
+        readings = _parse_ndjson(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        readings = data.get('readings') if isinstance(data, dict) else data
+        if not isinstance(readings, list):
+            return jsonify({"error": "Expected a list of readings"}), 400
+
+    stream = (ndjson_in or len(readings) >= Config.RISK_STREAM_MIN_ROWS
+              or request.accept_mimetypes.best == 'application/x-ndjson')
+    if not stream:
+        results = [r for chunk in _iter_chunks(readings, Config.RISK_BATCH_CHUNK) for r in _score_readings(chunk, rf_model)]
+        return jsonify({"count": len(results), "results": results})
+
+    def generate():
+        for chunk in _iter_chunks(readings, Config.RISK_BATCH_CHUNK):
+            yield ''.join(json.dumps(r) + '\n' for r in _score_readings(chunk, rf_model))
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/predict/risk/labels', methods=['POST'])
+def predict_risk_labels():
+    """
+    Threshold-based risk categories for many PM2.5 readings in one call.
+    Input: JSON {"pm25": [45, 120.5, null, ...]}
     """
     try:
-        data = request.json['history'] # List of 24 objects
-        # Preprocess
-        # Scale
-        # Predict
-        return jsonify({"forecast": "Implemented in next iteration"}) # Placeholder
+        pm25 = request.json['pm25']
+        if not isinstance(pm25, list):
+            return jsonify({"error": "pm25 must be a list of readings"}), 400
+        values = np.array([np.nan if v is None else v for v in pm25], dtype=float)
+        labels = label_risk(values)
+        # Missing readings have no category (training labels them as the top level)
+        risk_levels = np.where(np.isnan(values), None, labels.astype(str).astype(object))
+        return jsonify({
+            "risk_levels": risk_levels.tolist(),
+            "categories": list(labels.categories)
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@app.route('/predict/forecast', methods=['POST'])
+def predict_forecast():
+    """
+    Forecasts next 24h of PM2.5 using LSTM
+    Input: JSON {"history": [{"timestamp": ..., "pm25": ..., "pm10": ..., "no2": ..., "o3": ...}, ...]}
+           with at least Config.LSTM_SEQ_LEN hourly readings, oldest first (evenly spaced when timestamps are given).
+    """
+    with models.in_use() as store:
+        forecast_batcher = store.forecast_batcher
+        if forecast_batcher is None:
+            return jsonify({"error": "LSTM model not loaded"}), 503
+        try:
+            data = request.json['history']
+            window = store.forecaster.prepare_window(data)
+            forecast = forecast_batcher.submit(window)
+
+            response = {"forecast": forecast.tolist()}
+            last_ts = data[-1].get('timestamp') if isinstance(data[-1], dict) else None
+            if last_ts:
+                start = pd.Timestamp(last_ts) + pd.Timedelta(hours=1)
+                response["forecast_dates"] = pd.date_range(start=start, periods=len(forecast), freq='h').astype(str).tolist()
+            return jsonify(response)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 400
+
 if __name__ == '__main__':
     load_models()
+    start_model_watcher()
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,296 @@
+import asyncio
+import threading
+import json
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+class AsgiAdapter:
+    """
+    Serves the Flask (WSGI) app from an ASGI server such as uvicorn, same routes.
+    The event loop only moves bytes; every request runs in a bounded thread
+    pool (Parquet reads, Random Forest / LSTM calls release the GIL in NumPy),
+    so a slow request no longer blocks the others.
+    Backpressure: at most `threads` requests run at once and `max_queue` more
+    may wait up to `queue_timeout` seconds for a slot; anything beyond gets
+    503 + Retry-After instead of piling up. Streamed responses (NDJSON) are
+    relayed chunk by chunk through a small bounded queue, so a slow client
+    also slows its producer down.
+    `routes` maps paths to native ASGI handlers run on the event loop instead
+    (long-lived streams that would otherwise hold a thread each).
+    """
+    EXEMPT_PATHS = ('/health',) # Never rejected (load balancer probes)
+    STREAM_BUFFER = 16 # Chunks buffered between the worker thread and the client
+
+    def __init__(self, wsgi_app, threads=None, max_queue=None, queue_timeout=None, on_startup=None, on_shutdown=None,
+                 routes=None):
+        self.wsgi_app = wsgi_app
+        self.routes = routes or {}
+        self.threads = threads or Config.ASGI_THREADS
+        self.max_queue = Config.ASGI_MAX_QUEUE if max_queue is None else max_queue
+        self.queue_timeout = queue_timeout or Config.ASGI_QUEUE_TIMEOUT
+        self.on_startup = on_startup
+        self.on_shutdown = on_shutdown
+        # One thread beyond the request slots, so probes get answered under full load
+        self.pool = ThreadPoolExecutor(max_workers=self.threads + 1, thread_name_prefix="asgi-worker")
+        self._slots = None # asyncio.Semaphore, created inside the server's loop
+        self._waiting = 0
+        self.rejected = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type '{scope['type']}'")
+        if scope['path'] in self.routes:
+            return await self.routes[scope['path']](scope, receive, send)
+
+        body = await self._read_body(receive)
+        if scope['path'] in self.EXEMPT_PATHS:
+            return await self._serve(scope, body, send)
+        if not await self._acquire():
+            self.rejected += 1
+            return await self._reject(send)
+        try:
+            await self._serve(scope, body, send)
+        finally:
+            self._slots.release()
+
+    async def _lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    if self.on_startup is not None:
+                        await loop.run_in_executor(self.pool, self.on_startup)
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.on_shutdown is not None:
+                    await loop.run_in_executor(self.pool, self.on_shutdown)
+                self.pool.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.threads)
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            return False
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiting -= 1
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"error": "Server busy, retry later"}).encode()
+        await send({'type': 'http.response.start', 'status': 503,
+                    'headers': [(b'content-type', b'application/json'), (b'retry-after', b'1'),
+                                (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    @staticmethod
+    def _environ(scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+            'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+            'QUERY_STRING': scope['query_string'].decode('latin1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope['headers']:
+            name, value = name.decode('latin1'), value.decode('latin1')
+            if name == 'content-type':
+                key = 'CONTENT_TYPE'
+            elif name == 'content-length':
+                key = 'CONTENT_LENGTH'
+            else:
+                key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def _run(self, environ, put, cancelled):
+        """
+        Runs one request in a pool thread: the app call and the iteration
+        of its response stay on the same thread, as WSGI expects.
+        Sized responses (Content-Length set: every non-streamed Flask
+        response) are returned in one piece; streamed ones are handed to the
+        event loop chunk by chunk.
+        """
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = headers
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            # werkzeug always returns an iterator, so the header tells the two apart
+            if any(name.lower() == 'content-length' for name, _ in response['headers']):
+                return response['status'], response['headers'], b''.join(result)
+            put(('start', response['status'], response['headers']))
+            for chunk in result:
+                if cancelled.is_set():
+                    break
+                if chunk:
+                    put(('body', chunk))
+            return None
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+    async def _serve(self, scope, body, send):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(self.STREAM_BUFFER)
+        cancelled = threading.Event()
+
+        def put(item):
+            # Blocks the worker thread while the client-side buffer is full
+            if not cancelled.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        worker = loop.run_in_executor(self.pool, self._run, self._environ(scope, body), put, cancelled)
+        started = False
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({getter, worker}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    break
+                started = await self._relay(getter.result(), send, started)
+            # The worker has finished: flush what it queued last
+            while not queue.empty():
+                started = await self._relay(queue.get_nowait(), send, started)
+            buffered = await worker
+        except Exception as e:
+            cancelled.set()
+            while not queue.empty():
+                queue.get_nowait() # Unblock the worker thread
+            if started:
+                raise
+            print(f"ASGI request failed: {e}")
+            message = json.dumps({"error": str(e)}).encode()
+            await send({'type': 'http.response.start', 'status': 500,
+                        'headers': [(b'content-type', b'application/json')]})
+            await send({'type': 'http.response.body', 'body': message})
+            return
+        if buffered is not None:
+            status, headers, content = buffered
+            await self._relay(('start', status, headers), send, False)
+            await send({'type': 'http.response.body', 'body': content})
+            return
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    @staticmethod
+    async def _relay(item, send, started):
+        if item[0] == 'start':
+            if not started:
+                headers = [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in item[2]]
+                await send({'type': 'http.response.start', 'status': item[1], 'headers': headers})
+            return True
+        await send({'type': 'http.response.body', 'body': item[1], 'more_body': True})
+        return started
+
+async def live_stream(scope, receive, send):
+    """
+    /api/stream on the event loop: an idle SSE client holds no thread, only
+    its queue (same events and parameters as the Flask route).
+    """
+    from serving import api
+    from serving.live import HEARTBEAT
+
+    query = parse_qs(scope['query_string'].decode('latin1'))
+    headers = dict(scope['headers'])
+    sensor_id = query.get('sensor_id', [None])[0]
+    last_event_id = headers.get(b'last-event-id', b'').decode('latin1') or query.get('last_event_id', [None])[0]
+
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    sub, backlog = api.live.subscribe(sensor_id, last_event_id, notify=lambda: loop.call_soon_threadsafe(wakeup.set))
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass # The (empty) request body comes first
+
+    disconnect = asyncio.ensure_future(disconnected())
+    waiter = None
+    try:
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'text/event-stream; charset=utf-8'),
+                                (b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no')]})
+        await send({'type': 'http.response.body', 'body': api.live.preamble(backlog), 'more_body': True})
+        while True:
+            wakeup.clear()
+            frames = sub.drain()
+            if frames:
+                await send({'type': 'http.response.body', 'body': b''.join(frames), 'more_body': True})
+                continue
+            if sub.closed:
+                break # Fell behind: the client reconnects and resumes from its Last-Event-ID
+            waiter = asyncio.ensure_future(wakeup.wait())
+            done, _ = await asyncio.wait({waiter, disconnect}, timeout=Config.LIVE_HEARTBEAT,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            if disconnect in done:
+                return
+            if not done:
+                await send({'type': 'http.response.body', 'body': HEARTBEAT, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    except OSError:
+        pass # Client went away mid-write
+    finally:
+        api.live.unsubscribe(sub)
+        disconnect.cancel()
+        if waiter is not None:
+            waiter.cancel()
+
+def _startup():
+    from serving import api
+    api.load_models()
+    api.start_model_watcher()
+
+def _shutdown():
+    from serving import api
+    api.models.close()
+
+from serving import api
+app = AsgiAdapter(api.app, on_startup=_startup, on_shutdown=_shutdown, routes={'/api/stream': live_stream})
+
+if __name__ == "__main__":
+    import uvicorn
+    # Processes for CPU-bound inference, threads (ASGI_THREADS) for I/O within each
+    uvicorn.run("serving.asgi:app", host="0.0.0.0", port=5000, workers=Config.ASGI_WORKERS,
+                app_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
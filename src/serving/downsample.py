@@ -0,0 +1,95 @@
+import numpy as np
+
+def _bucket_edges(n, n_buckets):
+    # Equal-count buckets over the interior points 1..n-2 (first/last are always kept)
+    return np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+
+def minmax_indices(y, n_out):
+    """
+    Indices of the min and max of every bucket, plus the first and last point.
+    Keeps every peak visible (what matters for pollution spikes); fully vectorized.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 4:
+        return np.arange(n) if n <= n_out else np.array([0, n - 1])
+    n_buckets = (n_out - 2) // 2
+    edges = _bucket_edges(n, n_buckets)
+    counts = np.diff(edges)
+
+    # Buckets padded to the same width, so argmin/argmax run once on a 2-D block
+    width = counts.max()
+    positions = edges[:-1, None] + np.arange(width)[None, :]
+    padded = positions < edges[1:, None]
+    positions = np.where(padded, positions, edges[1:, None] - 1)
+    block = y[positions]
+    lows = positions[np.arange(n_buckets), block.argmin(axis=1)]
+    highs = positions[np.arange(n_buckets), block.argmax(axis=1)]
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: per bucket, the point forming the largest
+    triangle with the previously selected point and the next bucket's average.
+    Bucket averages are computed in one pass; only the selection (each choice
+    depends on the previous one) walks the buckets.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n) if n <= n_out else np.array([0, n - 1])
+    n_buckets = n_out - 2
+    edges = _bucket_edges(n, n_buckets)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # Third vertex: average of the next bucket (the last point for the last bucket)
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for b in range(n_buckets):
+        lo, hi = edges[b], edges[b + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[b]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[b] - ay))
+        a = lo + int(area.argmax())
+        selected[b + 1] = a
+    return selected
+
+METHODS = {"minmax": minmax_indices, "lttb": lttb_indices}
+
+def downsample(x, series, max_points, method="minmax"):
+    """
+    Rows to keep so that several series sharing the x axis fit in max_points.
+    Each series gets an equal share of the budget and is downsampled on its
+    own (NaN points skipped); the union keeps the extremes of every series.
+    x: timestamps or numbers; series: list of arrays. Returns sorted row indices.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}' (expected one of {list(METHODS)})")
+    x = np.asarray(x)
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = (x - x[0]) / np.timedelta64(1, 'h')
+    x = np.asarray(x, dtype=float)
+
+    share = max(max_points // max(len(series), 1), 3)
+    keep = []
+    for y in series:
+        y = np.asarray(y, dtype=float)
+        valid = np.flatnonzero(~np.isnan(y))
+        if not len(valid):
+            continue
+        if method == "minmax":
+            picked = minmax_indices(y[valid], share)
+        else:
+            picked = lttb_indices(x[valid], y[valid], share)
+        keep.append(valid[picked])
+    if not keep:
+        return np.array([0, n - 1])
+    return np.unique(np.concatenate(keep))
@@ -0,0 +1,128 @@
+import numpy as np
+import hashlib
+import gzip
+import json
+import os
+import sys
+from werkzeug.http import parse_accept_header
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+try:
+    import brotli # Optional: better ratio than gzip for JSON
+except ImportError:
+    brotli = None
+
+# Response formats of the data endpoints (?format= or the Accept header)
+FORMATS = {
+    "json": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "f32": "application/x-float32-columns",
+}
+
+def negotiate_format(request):
+    """
+    Format name requested by the client; JSON unless asked otherwise.
+    Raises ValueError for an unknown ?format=.
+    """
+    name = request.args.get('format')
+    if name is not None:
+        if name not in FORMATS:
+            raise ValueError(f"Unknown format '{name}' (expected one of {list(FORMATS)})")
+        return name
+    best = request.accept_mimetypes.best_match(list(FORMATS.values()), default=FORMATS["json"])
+    return next(name for name, mimetype in FORMATS.items() if mimetype == best)
+
+def etag(*parts):
+    """
+    Weak validator of a response from what it depends on (data versions,
+    model version, request URL, format).
+    """
+    return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
+
+def json_safe(value):
+    """
+    `value` with NaN/inf floats replaced by None, in nested dicts and lists
+    (NaN is not valid JSON; e.g. the stats of a range without readings).
+    """
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, (float, np.floating)) and not np.isfinite(value):
+        return None
+    return value
+
+def _column(values):
+    # Timestamps travel as epoch milliseconds, measurements as float32
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ms]').astype(np.int64)
+    return values.astype(np.float32)
+
+def pack_float32(tables, meta):
+    """
+    Packed columns with a small JSON header:
+        uint32 header length (little-endian) | header JSON | padding to 8 bytes | columns
+    The header holds `meta` and, per column, its table, name, dtype
+    ('int64' epoch ms or 'float32', little-endian), byte offset and length,
+    so a browser can view each column as a typed array without parsing numbers.
+    """
+    columns, arrays, offset = [], [], 0
+    for table, data in tables:
+        for name, values in data.items():
+            array = _column(values)
+            array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+            columns.append({"table": table, "name": name, "dtype": array.dtype.name,
+                            "offset": offset, "length": len(array)})
+            arrays.append(array)
+            offset += array.nbytes + (-array.nbytes % 8)
+    header = json.dumps({"meta": meta, "columns": columns}, separators=(',', ':')).encode()
+    header += b" " * (-(4 + len(header)) % 8) # Keeps every column 8-byte aligned
+    parts = [np.uint32(len(header)).astype('<u4').tobytes(), header]
+    for array in arrays:
+        parts += [array.tobytes(), b"\0" * (-array.nbytes % 8)]
+    return b"".join(parts)
+
+def to_arrow(tables, meta):
+    """
+    Arrow IPC stream: one record batch per table (tables share their columns),
+    `meta` and the table names in the schema metadata.
+    """
+    import pyarrow as pa
+
+    batches = []
+    for _, data in tables:
+        arrays = []
+        for values in data.values():
+            column = _column(values)
+            if np.issubdtype(np.asarray(values).dtype, np.datetime64):
+                arrays.append(pa.array(column.astype('datetime64[ms]')))
+            else:
+                arrays.append(pa.array(column))
+        batches.append(pa.RecordBatch.from_arrays(arrays, names=list(data)))
+    schema = batches[0].schema.with_metadata({"meta": json.dumps(meta), "tables": json.dumps([t for t, _ in tables])})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch.replace_schema_metadata(schema.metadata))
+    return sink.getvalue().to_pybytes()
+
+ENCODERS = {"arrow": to_arrow, "f32": pack_float32}
+
+def compress(body, accept_encoding):
+    """
+    (body, content encoding) using the best encoding the client accepts
+    (Accept-Encoding q-values: `gzip;q=0` refuses gzip); brotli wins ties
+    when installed. Small bodies are sent as is.
+    """
+    if len(body) < Config.RESPONSE_COMPRESS_MIN_BYTES:
+        return body, None
+    offers = ['br', 'gzip'] if brotli is not None else ['gzip']
+    encoding = parse_accept_header(accept_encoding).best_match(offers)
+    if encoding == 'br':
+        return brotli.compress(body, quality=Config.RESPONSE_BROTLI_QUALITY), 'br'
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=Config.RESPONSE_GZIP_LEVEL), 'gzip'
+    return body, None
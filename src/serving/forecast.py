@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import Future, TimeoutError
+import threading
+import queue
+import time
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+class LstmForecaster:
+    """
+    Recursive multi-step PM2.5 forecast with the trained LSTM.
+    Works on raw readings; scaling reuses the columns of the saved MinMax scaler.
+    Raw columns and rolling means follow Config.POLLUTANTS / ROLLING_WINDOWS,
+    the same settings DatePipeline.engineer_features trains on.
+    """
+    def __init__(self, model, scaler, features=None, seq_len=None, horizon=None):
+        self.model = model
+        self.features = features or Config.LSTM_FEATURES
+        self.seq_len = seq_len or Config.LSTM_SEQ_LEN
+        self.horizon = horizon or Config.FORECAST_HORIZON
+        self.columns = list(Config.POLLUTANTS)
+        # Rolling means among the LSTM features, as (feature, raw column position, window)
+        self._rolling = [(f"{col}_roll_mean_{window}h", self.columns.index(col), window)
+                         for col in Config.ROLLING_COLUMNS for window in Config.ROLLING_WINDOWS
+                         if f"{col}_roll_mean_{window}h" in self.features]
+        unsupported = set(self.features) - set(self.columns) - {name for name, _, _ in self._rolling}
+        if unsupported:
+            raise ValueError(f"LSTM features not computed at serving time: {sorted(unsupported)}")
+        # Raw rows needed so the rolling means of the first window are complete
+        self.context_len = self.seq_len + max([window for _, _, window in self._rolling], default=1) - 1
+
+        # The scaler was fitted on all engineered columns; keep only the LSTM ones
+        names = list(getattr(scaler, 'feature_names_in_', self.features))
+        idx = [names.index(c) for c in self.features]
+        self._scale = scaler.scale_[idx]
+        self._min = scaler.min_[idx]
+        self._target = self.features.index('pm25')
+
+    def prepare_window(self, history):
+        """
+        Converts the caller's history (records or DataFrame, oldest first, one
+        reading per hour) into a (context_len, n_pollutants) array of raw values.
+        """
+        df = pd.DataFrame(history)
+        missing = [c for c in self.columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"History is missing columns: {missing}")
+        if len(df) < self.seq_len:
+            raise ValueError(f"At least {self.seq_len} hourly readings are required, got {len(df)}")
+        # One series only: interleaved sensors would feed the LSTM unrelated readings in turn
+        if 'sensor_id' in df.columns and df['sensor_id'].nunique() > 1:
+            raise ValueError("History mixes several sensors; pass one sensor or a per-timestamp aggregate")
+        stamps = None
+        if 'timestamp' in df.columns:
+            stamps = pd.DatetimeIndex(pd.to_datetime(df['timestamp']))
+        elif isinstance(df.index, pd.DatetimeIndex):
+            stamps = df.index
+        if stamps is not None:
+            if stamps.has_duplicates:
+                raise ValueError("History has repeated timestamps; pass one sensor or an hourly aggregate")
+            # The LSTM was trained on hourly steps: skewed or gappy series would shift every lag
+            steps = np.diff(stamps[-self.context_len:].to_numpy())
+            if (steps != np.timedelta64(1, 'h')).any():
+                raise ValueError("History must be evenly spaced hourly readings, oldest first")
+
+        values = df[self.columns].astype(float).ffill().bfill().to_numpy()[-self.context_len:]
+        if np.isnan(values).any():
+            raise ValueError("History contains columns with no valid readings")
+        # Short histories: repeat the oldest reading so every request has the same shape
+        if len(values) < self.context_len:
+            values = np.pad(values, ((self.context_len - len(values), 0), (0, 0)), mode='edge')
+        return values
+
+    def _build_inputs(self, raw):
+        """
+        (N, context_len, n_pollutants) raw values -> (N, seq_len, n_features) scaled LSTM inputs
+        """
+        columns = {c: raw[:, :, i] for i, c in enumerate(self.columns)}
+        for name, i, window in self._rolling:
+            csum = np.cumsum(raw[:, :, i], axis=1)
+            roll = np.empty_like(csum)
+            roll[:, :window] = csum[:, :window] / np.arange(1, window + 1)
+            roll[:, window:] = (csum[:, window:] - csum[:, :-window]) / window
+            columns[name] = roll
+        X = np.stack([columns[c] for c in self.features], axis=-1)[:, -self.seq_len:]
+        return (X * self._scale + self._min).astype(np.float32)
+
+    def forecast_batch(self, windows):
+        """
+        Forecasts `horizon` steps for every window with one model call per step.
+        Exogenous pollutants are carried forward from the last observed reading.
+        """
+        raw = np.array(windows, dtype=np.float64)
+        preds = np.empty((len(raw), self.horizon))
+        for step in range(self.horizon):
+            y_scaled = np.asarray(self.model.predict_on_batch(self._build_inputs(raw)))[:, 0]
+            pm25 = (y_scaled - self._min[self._target]) / self._scale[self._target]
+            pm25 = np.maximum(pm25, 0)
+            preds[:, step] = pm25
+
+            next_row = raw[:, -1].copy()
+            next_row[:, self.columns.index('pm25')] = pm25
+            raw = np.concatenate([raw[:, 1:], next_row[:, None, :]], axis=1)
+        return list(preds)
+
+class MicroBatcher:
+    """
+    Coalesces concurrent requests into a single batched call.
+    After the first item arrives the worker waits at most `max_wait_ms`
+    (or until `max_batch` items are queued), then calls `fn` once on the batch.
+    Callers wait at most `timeout` seconds for their result.
+    """
+    def __init__(self, fn, max_batch=None, max_wait_ms=None, timeout=None):
+        self.fn = fn
+        self.max_batch = max_batch or Config.FORECAST_MAX_BATCH
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else Config.FORECAST_MAX_WAIT_MS) / 1000.0
+        self.timeout = timeout or Config.FORECAST_TIMEOUT
+        self._queue = queue.Queue()
+        self._lock = threading.Lock() # Orders submits against close: nothing lands behind the sentinel
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="forecast-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item, timeout=None):
+        """
+        Queues one item and blocks until its result is ready.
+        Raises concurrent.futures.TimeoutError after `timeout` (default: the batcher's).
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Batcher is closed")
+            self._queue.put((item, future))
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except TimeoutError:
+            future.cancel() # Not computed if the worker has not picked it up yet
+            raise
+
+    def close(self):
+        """
+        Lets the worker finish the items already queued, then exit.
+        If the worker is gone, the queued items fail instead of waiting forever.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put((None, None))
+        if not self._worker.is_alive():
+            self._fail_pending()
+
+    def _fail_pending(self):
+        while True:
+            try:
+                _, future = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("Batcher is closed"))
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch and batch[-1][1] is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            closing = batch[-1][1] is None
+            if closing:
+                batch.pop()
+            # Skips items whose caller gave up (timed out) before they ran
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if batch:
+                try:
+                    results = self.fn([item for item, _ in batch])
+                    for (_, future), result in zip(batch, results):
+                        future.set_result(result)
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+            if closing:
+                self._fail_pending()
+                return
@@ -0,0 +1,282 @@
+import pandas as pd
+import numpy as np
+import threading
+import queue
+import json
+import time
+import os
+import sys
+from collections import deque
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from modeling.risk import label_risk
+
+HEARTBEAT = b": keep-alive\n\n" # SSE comment, keeps proxies from closing idle streams
+
+def _clean(value):
+    # NaN is not valid JSON
+    return None if value is None or pd.isna(value) else round(float(value), 2)
+
+class Subscription:
+    """
+    One connected client: a bounded queue of encoded events.
+    notify (optional) is called after each delivery, e.g. to wake an event loop.
+    """
+    def __init__(self, sensor_id=None, size=None, notify=None):
+        self.sensor_id = sensor_id
+        self.queue = queue.Queue(size or Config.LIVE_CLIENT_BUFFER)
+        self.notify = notify
+        self.closed = False
+
+    def wants(self, sensor_id):
+        # Unfiltered clients get everything, including network-wide events (sensor_id None)
+        return self.sensor_id is None or self.sensor_id == sensor_id
+
+    def deliver(self, frame):
+        self.queue.put_nowait(frame)
+        if self.notify is not None:
+            self.notify()
+
+    def drain(self):
+        frames = []
+        while True:
+            try:
+                frames.append(self.queue.get_nowait())
+            except queue.Empty:
+                return frames
+
+class LivePublisher:
+    """
+    Single in-process source of the dashboard's live events (SSE /api/stream).
+    A background thread watches the warehouse version; when the ETL lands new
+    data it reads each updated sensor's latest reading once, labels its risk
+    and re-forecasts every updated sensor in one batched model call. Readings
+    scored by the API are published as they arrive. Each event is encoded once
+    and queued to every subscriber, so N clients cost one computation.
+    Events (sensor_id null: the fleet mean per hour, as in /api/stats):
+        reading:  latest reading of a sensor, risk_level from the PM2.5
+                  thresholds; readings scored by the API also carry the
+                  Random Forest's predicted_risk
+        forecast: next hours for a sensor with the change from the previous forecast
+        snapshot: on connect, the current readings and forecasts
+    Clients that fall LIVE_CLIENT_BUFFER events behind are disconnected; their
+    EventSource reconnects with Last-Event-ID and the missed events are replayed.
+    """
+    def __init__(self, warehouse, models=None, interval=None, replay=None):
+        """
+        warehouse: serving.warehouse.WarehouseCache
+        models: callable returning the current ModelStore (follows hot swaps)
+        """
+        self.warehouse = warehouse
+        self.models = models
+        self.interval = interval or Config.LIVE_POLL_INTERVAL
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._replay = deque(maxlen=replay or Config.LIVE_REPLAY) # (id, sensor_id, frame)
+        self._last_id = 0
+        self._readings = {} # sensor_id -> latest reading payload
+        self._forecasts = {} # sensor_id (None: all sensors) -> latest forecast payload
+        self._version = None
+        self._watermarks = {}
+        self._watcher = None
+
+    def _frame(self, event_id, event, data):
+        return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+    def publish(self, event, data, sensor_id=None):
+        """
+        Encodes one event and queues it to every interested subscriber.
+        """
+        with self._lock:
+            self._last_id += 1
+            event_id = self._last_id
+            frame = self._frame(event_id, event, data)
+            self._replay.append((event_id, sensor_id, frame))
+            subscribers = [sub for sub in self._subscribers if sub.wants(sensor_id)]
+        for sub in subscribers:
+            try:
+                sub.deliver(frame)
+            except queue.Full:
+                self._drop(sub)
+        return event_id
+
+    def _drop(self, sub):
+        sub.closed = True
+        self.unsubscribe(sub)
+        if sub.notify is not None:
+            sub.notify()
+
+    def subscribe(self, sensor_id=None, last_event_id=None, notify=None):
+        """
+        Registers a client. Returns (subscription, backlog frames): the events
+        missed since last_event_id when still in the replay buffer, else a snapshot.
+        Taken under the publish lock, so nothing is lost or sent twice.
+        """
+        self.start()
+        sub = Subscription(sensor_id, notify=notify)
+        with self._lock:
+            self._subscribers.add(sub)
+            try:
+                last_event_id = int(last_event_id) if last_event_id is not None else None
+            except ValueError:
+                last_event_id = None
+            # Ids restart with the process: an id from the future gets a snapshot too
+            replayable = (last_event_id is not None and self._replay
+                          and self._replay[0][0] <= last_event_id + 1 and last_event_id <= self._last_id)
+            if replayable:
+                backlog = [frame for event_id, sid, frame in self._replay if event_id > last_event_id and sub.wants(sid)]
+            else:
+                snapshot = {
+                    "readings": [r for s, r in self._readings.items() if sub.wants(s)],
+                    "forecasts": [f for s, f in self._forecasts.items() if sub.wants(s)],
+                }
+                backlog = [self._frame(self._last_id, "snapshot", snapshot)]
+        return sub, backlog
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def preamble(self, backlog):
+        # Reconnect delay for EventSource, then the backlog
+        return f"retry: {Config.LIVE_RETRY_MS}\n\n".encode() + b"".join(backlog)
+
+    def stream(self, sensor_id=None, last_event_id=None):
+        """
+        SSE byte stream for one client, for WSGI servers (holds a thread per client).
+        """
+        sub, backlog = self.subscribe(sensor_id, last_event_id)
+        try:
+            yield self.preamble(backlog)
+            while not (sub.closed and sub.queue.empty()):
+                try:
+                    yield sub.queue.get(timeout=Config.LIVE_HEARTBEAT)
+                except queue.Empty:
+                    yield HEARTBEAT
+        finally:
+            self.unsubscribe(sub)
+
+    def publish_readings(self, readings):
+        """
+        Publishes the latest of the given readings per sensor (dicts with
+        sensor_id, timestamp, pollutants and optionally predicted_risk).
+        """
+        latest = {}
+        for reading in readings:
+            latest[reading['sensor_id']] = reading
+        pm25 = [_clean(r.get('pm25')) for r in latest.values()]
+        levels = [str(level) if value is not None else None for value, level in zip(pm25, label_risk(pm25))]
+        for (sensor_id, reading), level in zip(latest.items(), levels):
+            payload = {"sensor_id": sensor_id, "timestamp": str(pd.Timestamp(reading['timestamp']))}
+            if reading.get('location') is not None:
+                payload["location"] = reading['location']
+            payload.update({col: _clean(reading.get(col)) for col in Config.POLLUTANTS})
+            # One meaning for risk_level across sources (same labels as /api/stats)
+            payload["risk_level"] = level
+            if reading.get('predicted_risk') is not None:
+                payload["predicted_risk"] = str(reading['predicted_risk'])
+            with self._lock:
+                self._readings[sensor_id] = payload
+            self.publish("reading", payload, sensor_id)
+        return len(latest)
+
+    def _latest_rows(self, watermarks):
+        """
+        Latest warehouse row of each sensor (one pruned read per distinct watermark).
+        """
+        groups = {}
+        for sensor_id, ts in watermarks.items():
+            groups.setdefault(ts, []).append(sensor_id)
+        parts = [self.warehouse.warehouse.read(start=ts, sensors=sensors) for ts, sensors in groups.items()]
+        df = pd.concat([p for p in parts if p is not None and not p.empty], ignore_index=True) if parts else None
+        if df is None or df.empty:
+            return None
+        return df.sort_values('timestamp', kind='stable').groupby('sensor_id', sort=True).tail(1)
+
+    def _publish_forecasts(self, sensors):
+        """
+        Forecasts every given sensor (None: fleet mean) in one model call
+        and publishes each with its change from the previous forecast.
+        """
+        store = self.models() if self.models is not None else None
+        forecaster = store.forecaster if store is not None else None
+        if forecaster is None:
+            return 0
+        keys, windows, starts = [], [], []
+        for sensor_id in sensors:
+            history = self.warehouse.tail(forecaster.context_len, sensor_id)
+            if history is None or history.empty:
+                continue
+            keys.append(sensor_id)
+            windows.append(forecaster.prepare_window(history))
+            starts.append(history.index[-1] + pd.Timedelta(hours=1))
+        if not windows:
+            return 0
+        for sensor_id, values, start in zip(keys, forecaster.forecast_batch(windows), starts):
+            dates = pd.date_range(start=start, periods=len(values), freq='h')
+            current = pd.Series(np.asarray(values, dtype=float), index=dates)
+            previous = self._forecasts.get(sensor_id)
+            delta = None
+            if previous is not None:
+                before = pd.Series(previous["values"], index=pd.DatetimeIndex(previous["dates"]), dtype=float)
+                delta = [_clean(v) for v in current - before.reindex(dates)]
+            payload = {
+                "sensor_id": sensor_id,
+                "dates": dates.astype(str).tolist(),
+                "values": [_clean(v) for v in current],
+                "forecast_avg": _clean(current.mean()),
+                "delta": delta,
+            }
+            with self._lock:
+                self._forecasts[sensor_id] = payload
+            self.publish("forecast", payload, sensor_id)
+        return len(keys)
+
+    def refresh(self):
+        """
+        Publishes what the ETL added since the last check.
+        Returns the number of sensors with new readings.
+        """
+        version = self.warehouse.version
+        if version is None or version == self._version:
+            return 0
+        watermarks = self.warehouse.warehouse.load_watermarks()
+        changed = {s: ts for s, ts in watermarks.items() if self._watermarks.get(s) != ts}
+        self._version, self._watermarks = version, watermarks
+        if not changed:
+            return 0
+        rows = self._latest_rows(changed)
+        if rows is not None:
+            self.publish_readings(rows.to_dict('records'))
+        # Fleet view: mean of the sensors at the latest hour
+        fleet = self.warehouse.tail(1)
+        if fleet is not None and len(fleet):
+            self.publish_readings([dict(fleet.iloc[-1], sensor_id=None, timestamp=fleet.index[-1])])
+        self._publish_forecasts([None] + sorted(changed))
+        return len(changed)
+
+    def start(self):
+        """
+        Starts the watcher thread on first use (per process: threads do not survive fork).
+        """
+        if self._watcher is not None:
+            return self._watcher
+
+        def watch():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Live refresh failed: {e}")
+                time.sleep(self.interval)
+
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=watch, name="live-publisher", daemon=True)
+                self._watcher.start()
+        return self._watcher
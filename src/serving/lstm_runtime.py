@@ -0,0 +1,86 @@
+import numpy as np
+
+def _sigmoid(x):
+    # Same formulation as Keras, computed in place to avoid temporaries
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1.0
+    np.reciprocal(x, out=x)
+    return x
+
+class NumpyLstm:
+    """
+    TensorFlow-free forward pass of the stacked LSTM exported by
+    LstmModel.export_numpy. Exposes predict/predict_on_batch like the Keras
+    model, so LstmForecaster can use either backend.
+    """
+    def __init__(self, path, dtype=np.float32):
+        self.path = path
+        self.dtype = dtype
+        with np.load(path) as weights:
+            self.input_shape = tuple(int(d) for d in weights['input_shape'])
+            self.layers = []
+            for i, kind in enumerate(weights['layers']):
+                layer = {'kind': str(kind),
+                         'kernel': weights[f'layer{i}_kernel'].astype(dtype),
+                         'bias': weights[f'layer{i}_bias'].astype(dtype)}
+                if kind == 'lstm':
+                    layer['recurrent'] = weights[f'layer{i}_recurrent'].astype(dtype)
+                    # Keras gate order is (i, f, c, o); regroup as (i, f, o, c) so the
+                    # three sigmoid gates form one contiguous block
+                    units = layer['recurrent'].shape[0]
+                    order = np.r_[0:2 * units, 3 * units:4 * units, 2 * units:3 * units]
+                    for key in ('kernel', 'recurrent', 'bias'):
+                        layer[key] = np.ascontiguousarray(layer[key][..., order])
+                    layer['return_sequences'] = bool(weights[f'layer{i}_return_sequences'])
+                else:
+                    layer['activation'] = str(weights[f'layer{i}_activation'])
+                self.layers.append(layer)
+
+    @staticmethod
+    def _lstm(x, kernel, recurrent, bias, return_sequences):
+        n, steps, _ = x.shape
+        units = recurrent.shape[0]
+        # Input projections of all timesteps in one matmul
+        xw = (x.reshape(n * steps, -1) @ kernel + bias).reshape(n, steps, 4 * units)
+        h = np.zeros((n, units), dtype=x.dtype)
+        c = np.zeros((n, units), dtype=x.dtype)
+        outputs = np.empty((n, steps, units), dtype=x.dtype) if return_sequences else None
+
+        for t in range(steps):
+            z = h @ recurrent
+            z += xw[:, t]
+            gates = _sigmoid(z[:, :3 * units])
+            g = np.tanh(z[:, 3 * units:], out=z[:, 3 * units:])
+            c *= gates[:, units:2 * units]
+            g *= gates[:, :units]
+            c += g
+            h = np.tanh(c) * gates[:, 2 * units:]
+            if return_sequences:
+                outputs[:, t] = h
+        return outputs if return_sequences else h
+
+    def predict_on_batch(self, X):
+        """
+        X: (n, seq_len, n_features) -> (n, outputs)
+        """
+        x = np.asarray(X, dtype=self.dtype)
+        for layer in self.layers:
+            if layer['kind'] == 'lstm':
+                x = self._lstm(x, layer['kernel'], layer['recurrent'], layer['bias'], layer['return_sequences'])
+            else:
+                x = x @ layer['kernel'] + layer['bias']
+                if layer['activation'] == 'relu':
+                    x = np.maximum(x, 0)
+        return x
+
+    @property
+    def output_size(self):
+        last = self.layers[-1]
+        return last['recurrent'].shape[0] if last['kind'] == 'lstm' else last['kernel'].shape[1]
+
+    def predict(self, X, batch_size=256, verbose=0):
+        X = np.asarray(X)
+        if len(X) == 0:
+            return np.empty((0, self.output_size), dtype=self.dtype)
+        return np.concatenate([self.predict_on_batch(X[i:i + batch_size]) for i in range(0, len(X), batch_size)])
@@ -0,0 +1,173 @@
+import numpy as np
+import joblib
+import threading
+from contextlib import contextmanager
+import time
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from serving.forecast import LstmForecaster, MicroBatcher
+from serving.lstm_runtime import NumpyLstm
+
+class ModelStore:
+    """
+    Serving models, loaded on first use instead of at import time.
+    Scaler and Random Forest are plain pickles: preload() them in the
+    gunicorn master so forked workers share them copy-on-write.
+    With the Keras backend the LSTM pulls in TensorFlow (not fork-safe, and
+    heavy), so it is only imported inside a worker, the first time a forecast
+    is needed; the NumPy backend (Config.LSTM_BACKEND) avoids TensorFlow entirely.
+    A missing or broken model is reported once and served as None.
+    """
+    LSTM_FILES = ["lstm_best.keras", "lstm_model.keras", "lstm_model.h5"] # Preferred first, then fallback/legacy
+    LSTM_WEIGHTS = "lstm_weights.npz" # Export for the NumPy backend
+
+    def __init__(self, model_dir=None, version=None):
+        self.model_dir = model_dir or Config.MODEL_DIR
+        self.version = version # Registry version, None for the plain MODEL_DIR files
+        self._lock = threading.RLock()
+        self._models = {}
+        self._in_use = 0 # Requests holding this store (see in_use)
+        self._retired = False
+
+    def _get(self, name, loader, report=True):
+        if name not in self._models:
+            with self._lock:
+                if name not in self._models:
+                    start = time.perf_counter()
+                    try:
+                        self._models[name] = loader()
+                    except Exception as e:
+                        print(f"Error loading {name}: {e}")
+                        self._models[name] = None
+                    if report and self._models[name] is not None:
+                        print(f"Loaded {name} in {time.perf_counter() - start:.2f}s")
+        return self._models[name]
+
+    def _load_pickle(self, filename):
+        path = os.path.join(self.model_dir, filename)
+        if not os.path.exists(path):
+            print(f"Warning: {path} not found.")
+            return None
+        return joblib.load(path)
+
+    def _load_lstm(self):
+        if Config.LSTM_BACKEND == "numpy":
+            path = os.path.join(self.model_dir, self.LSTM_WEIGHTS)
+            if os.path.exists(path):
+                return NumpyLstm(path)
+            print(f"Warning: {path} not found, falling back to the Keras LSTM.")
+        for filename in self.LSTM_FILES:
+            path = os.path.join(self.model_dir, filename)
+            if os.path.exists(path):
+                from tensorflow.keras.models import load_model # Deferred: TF import takes seconds
+                return load_model(path)
+        print("Warning: LSTM model not found.")
+        return None
+
+    def _build_forecaster(self):
+        if self.lstm_model is None or self.scaler is None:
+            return None
+        return LstmForecaster(self.lstm_model, self.scaler)
+
+    def _build_batcher(self):
+        if self.forecaster is None:
+            return None
+        # Concurrent forecast requests share one model call per step
+        return MicroBatcher(self.forecaster.forecast_batch)
+
+    @property
+    def scaler(self):
+        return self._get('scaler', lambda: self._load_pickle("scaler.pkl"))
+
+    @property
+    def rf_model(self):
+        return self._get('rf_model', lambda: self._load_pickle("rf_classifier.pkl"))
+
+    @property
+    def lstm_model(self):
+        return self._get('lstm_model', self._load_lstm)
+
+    @property
+    def forecast_batcher(self):
+        return self._get('forecast_batcher', self._build_batcher, report=False)
+
+    @property
+    def forecaster(self):
+        return self._get('forecaster', self._build_forecaster, report=False)
+
+    def preload(self, lstm=False):
+        """
+        Loads the models up front (e.g. in the gunicorn master before forking).
+        The LSTM is left to the workers unless lstm=True.
+        """
+        self.scaler, self.rf_model
+        if lstm:
+            self.forecast_batcher
+        return self
+
+    def warm_up(self):
+        """
+        Loads every model and runs one dummy prediction each, so the first
+        real request does not pay for lazy initialisation inside the libraries.
+        """
+        self.preload(lstm=True)
+        rf_model = self.rf_model
+        if rf_model is not None:
+            rf_model.predict(np.zeros((1, rf_model.n_features_in_)))
+        forecaster = self.forecaster
+        if forecaster is not None:
+            forecaster.forecast_batch([np.ones((forecaster.context_len, len(forecaster.columns)))])
+        return self
+
+    @contextmanager
+    def in_use(self):
+        """
+        Holds the store for one request: a closed (retired) store keeps its
+        forecast worker until the last request holding it has finished.
+        """
+        with self._lock:
+            self._in_use += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                if self._retired and self._in_use == 0:
+                    self._close_batcher()
+
+    def close(self):
+        """
+        Retires the store: its forecast worker stops once the requests holding
+        it are done and its queued forecasts are served.
+        A request that still picks the store up afterwards gets a fresh worker,
+        closed again when that request ends.
+        """
+        with self._lock:
+            self._retired = True
+            if self._in_use == 0:
+                self._close_batcher()
+
+    def _close_batcher(self):
+        batcher = self._models.pop('forecast_batcher', None)
+        if batcher is not None:
+            batcher.close()
+
+    @classmethod
+    def from_registry(cls, registry):
+        """
+        Store for the registry's current bundle, or the plain MODEL_DIR files
+        when nothing has been promoted yet.
+        """
+        version = registry.current()
+        if version is None:
+            return cls()
+        return cls(registry.path(version), version=version)
+
+    def loaded(self):
+        """
+        {model name: True/False} for the models loaded so far.
+        """
+        return {name: model is not None for name, model in self._models.items()}
@@ -6,7 +6,7 @@ class NarrativeService:
         """
         story = f"Air quality is currently classified as {risk_level}. "
         
-        if risk_level == "Safe":
+        if risk_level in ("Safe", "Normal"):
             story += "Conditions are optimal for outdoor activities. "
         elif risk_level == "Moderate":
             story += "Sensitive individuals should consider limiting prolonged outdoor exertion. "
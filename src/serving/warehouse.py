@@ -0,0 +1,137 @@
+import pandas as pd
+import threading
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from processing.warehouse import Warehouse
+from processing.rollups import RollupStore
+
+class WarehouseCache:
+    """
+    Shared in-memory reader for the Data Warehouse.
+    Results are kept until an ETL run bumps the warehouse version, so API
+    polling no longer re-reads Parquet per request. Time windows are read
+    with partition pruning: a 24h view only opens the last day's files.
+    Without a sensor_id, windows are the fleet mean per hour, bucketed like
+    the rollups (sensor clocks are skewed, so exact timestamps rarely match),
+    never interleaved sensors.
+    """
+    MAX_WINDOWS = 256
+
+    def __init__(self, path=None, columns=None):
+        self.warehouse = Warehouse(path)
+        self.path = self.warehouse.path
+        self.columns = columns
+        self._lock = threading.Lock()
+        self._version = None
+        self._windows = {}
+
+    def _prepare(self, df):
+        if 'timestamp' in df.columns:
+            df.index = pd.DatetimeIndex(pd.to_datetime(df['timestamp']), name='datetime')
+            if not df.index.is_monotonic_increasing:
+                df = df.sort_index(kind='stable')
+        return df
+
+    def _sync(self):
+        version = self.warehouse.version()
+        if version != self._version:
+            with self._lock:
+                # Another thread may have reset the cache while we waited
+                if version != self._version:
+                    self._windows, self._version = {}, version
+        return version
+
+    @property
+    def version(self):
+        """
+        Identifier of the cached warehouse snapshot (changes after each ETL run).
+        """
+        return self._sync()
+
+    @staticmethod
+    def _aggregate(df):
+        # Mean of the readings in each hour (NaN skipped), same buckets as RollupStore._bucket
+        buckets = df.index.floor('h').rename(df.index.name)
+        values = df.drop(columns=['timestamp'], errors='ignore').groupby(buckets, sort=True).mean()
+        if 'timestamp' in df.columns:
+            values.insert(0, 'timestamp', values.index.strftime('%Y-%m-%dT%H:%M:%S'))
+        return values
+
+    def window(self, hours, sensor_id=None):
+        """
+        Readings of the last `hours` hours up to the latest processed timestamp
+        (taken from the watermarks, so no scan is needed to find it).
+        Without sensor_id: the fleet mean per hour, whole hours only.
+        """
+        if self._sync() is None:
+            return None
+        key = (hours, sensor_id)
+        windows = self._windows
+        df = windows.get(key)
+        if df is not None:
+            return df
+
+        sensors = [sensor_id] if sensor_id is not None else None
+        watermarks = self.warehouse.load_watermarks()
+        if sensor_id is not None:
+            watermarks = {s: ts for s, ts in watermarks.items() if s == sensor_id}
+        span = pd.Timedelta(hours=hours - 1)
+        if watermarks:
+            start = pd.Timestamp(max(watermarks.values())).floor('h') - span
+            df = self._prepare(self.warehouse.read(columns=self.columns, start=start, sensors=sensors))
+        else:
+            df = self._prepare(self.warehouse.read(columns=self.columns, sensors=sensors))
+            if len(df):
+                df = df[df.index >= df.index.max().floor('h') - span]
+        if sensor_id is None:
+            df = self._aggregate(df)
+
+        if len(windows) >= self.MAX_WINDOWS:
+            windows.clear()
+        windows[key] = df
+        return df
+
+    def tail(self, hours, sensor_id=None):
+        """
+        Last `hours` hours of readings (one row per hour unless the sensor
+        has gaps), served from the cached windows.
+        Callers must treat the result as read-only.
+        """
+        return self.window(hours, sensor_id)
+
+class RollupCache:
+    """
+    Query results of the rollup store, kept until the ETL updates the rollups
+    (dashboard views re-ask the same ranges on every poll).
+    """
+    MAX_QUERIES = 256
+
+    def __init__(self, store=None):
+        self.store = store or RollupStore()
+        self._lock = threading.Lock()
+        self._version = None
+        self._queries = {}
+
+    def query(self, start, end, sensor_id=None, grain=None):
+        """
+        Same as RollupStore.query; callers must treat the result as read-only.
+        """
+        version = self.store.version()
+        if version is None:
+            return None
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._queries, self._version = {}, version
+        key = (pd.Timestamp(start), pd.Timestamp(end), sensor_id, grain)
+        queries = self._queries
+        df = queries.get(key)
+        if df is None:
+            df = self.store.query(start, end, sensor_id, grain)
+            if len(queries) >= self.MAX_QUERIES:
+                queries.clear()
+            queries[key] = df
+        return df